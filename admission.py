@@ -0,0 +1,61 @@
+import os
+import time
+
+# Degradation ladder as (fps factor, resolution factor); level 0 is full quality
+QUALITY_LEVELS = [
+    (1.0, 1.0),
+    (0.5, 1.0),
+    (0.5, 0.75),
+    (0.5, 0.5),
+]
+STREAM_CORES = 0.25  # Assumed cost of one stream until check_load has measured one
+COST_SMOOTHING = 0.3  # EWMA weight of a new per-stream cost sample
+
+
+class LoadMonitor:
+    """Host CPU utilisation from /proc/stat, falling back to the load average"""
+
+    def __init__(self):
+        self.last = self._read_proc_stat()
+
+    def _read_proc_stat(self):
+        try:
+            with open("/proc/stat") as f:
+                fields = [int(v) for v in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)  # idle + iowait
+        return sum(fields), idle
+
+    def cpu_usage(self):
+        """Busy fraction (0..1) since the previous call, or None if unknown"""
+        current = self._read_proc_stat()
+        if current is None or self.last is None:
+            try:
+                return min(os.getloadavg()[0] / (os.cpu_count() or 1), 1.0)
+            except (AttributeError, OSError):
+                return None
+        total = current[0] - self.last[0]
+        idle = current[1] - self.last[1]
+        self.last = current
+        if total <= 0:
+            return None
+        return (total - idle) / total
+
+
+def sample_cpu(seconds=0.5):
+    """One-off host CPU sample over a short window, independent of other monitors"""
+    monitor = LoadMonitor()
+    time.sleep(seconds)
+    return monitor.cpu_usage()
+
+
+def process_cpu_seconds(pid="self"):
+    """User+system CPU seconds used by a process (Linux /proc), or None"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    # utime and stime are fields 14 and 15 of stat, i.e. 12 and 13 after comm
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
@@ -0,0 +1,396 @@
+"""Multi-node sharding: a controller spreads the fleet config over worker agents.
+
+Each agent is a normal MultiStreamManager behind a small JSON/HTTP API:
+
+    GET  /status   -> {"agent", "cpu", "cores", "streams": [{key, status, cost, ...}]}
+    POST /assign   <- {"streams": [fleet config stream entries]}
+
+An assignment is applied with MultiStreamManager.apply_config, so an agent
+only starts/stops the streams that moved. The controller polls every agent,
+learns each stream's CPU cost (cores, EWMA) from the agents' measurements,
+places new streams greedily on the least loaded live agent, moves at most
+one stream per tick when agents drift out of balance, and reassigns all
+streams of an agent that misses DEAD_AFTER consecutive polls. A stream an
+agent refused (admission control) is offered to another agent that has not
+refused it within REFUSED_RETRY seconds.
+
+Local test with three agents:
+
+    python multi_stream.py --agent 127.0.0.1:9101 &
+    python multi_stream.py --agent 127.0.0.1:9102 &
+    python multi_stream.py --agent 127.0.0.1:9103 &
+    python multi_stream.py fleet.json    # with "agents": ["http://127.0.0.1:9101", ...]
+
+Editing "agents" in a running config adds/drops agents; a dropped agent's
+streams are stopped there and placed on the others. fleet_cluster_check.py
+runs placement, failover and refusal checks against fake agents.
+"""
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from admission import process_cpu_seconds
+from fleet_config import stream_key
+
+DEAD_AFTER = 3  # Missed polls before an agent's streams are reassigned
+REQUEST_TIMEOUT = 3.0
+COST_SMOOTHING = 0.3  # EWMA weight of a new cost sample
+DEFAULT_COST = 0.25  # Cores per stream until something is measured
+REFUSED_RETRY = 60.0  # Seconds before an agent that refused a stream is offered it again
+
+
+def _request(url, payload=None, timeout=REQUEST_TIMEOUT):
+    data = None if payload is None else json.dumps(payload).encode()
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read().decode() or "null")
+
+
+# --------- Worker agent ---------
+class StreamAgent:
+    """Exposes a MultiStreamManager to a controller over HTTP"""
+
+    def __init__(self, manager, host, port):
+        self.manager = manager
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.name = f"{host}:{self.server.server_address[1]}"  # Actual port when given 0
+        self._pending = None  # Latest assignment not applied yet
+        self._wake = threading.Event()
+        self._cpu_marks = {}  # pid -> (cpu seconds, wallclock) at previous /status
+        self._status_lock = threading.Lock()  # Status requests may arrive concurrently
+
+    def _handler(self):
+        agent = self
+
+        class AgentHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/status":
+                    self.send_error(404, "Not Found")
+                    return
+                self._reply(200, agent.status())
+
+            def do_POST(self):
+                if self.path != "/assign":
+                    self.send_error(404, "Not Found")
+                    return
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                agent.assign(json.loads(body.decode()))
+                self._reply(202, {"accepted": True})
+
+            def _reply(self, code, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                return
+
+        return AgentHandler
+
+    def assign(self, config):
+        # Applied on the agent's own thread: starting streams waits for them
+        # to go live, which must not hold the controller's request open
+        self._pending = {"streams": config.get("streams", [])}
+        self._wake.set()
+
+    def _cpu_rate(self, pid):
+        """Cores used by a process since the previous status call"""
+        seconds, now = process_cpu_seconds(pid), time.monotonic()
+        previous = self._cpu_marks.get(pid)
+        if seconds is None:
+            return None
+        self._cpu_marks[pid] = (seconds, now)
+        if previous is None or now <= previous[1]:
+            return None
+        return (seconds - previous[0]) / (now - previous[1])
+
+    def status(self):
+        with self._status_lock:
+            return self._status()
+
+    def _status(self):
+        manager = self.manager
+        running = [s for s in manager.streamers if s.running and not s.refused]
+        own = self._cpu_rate(os.getpid())
+        seen = {os.getpid()}
+        streams = []
+        for key, streamer in list(manager.by_key.items()):
+            cost = None
+            process = streamer.process  # Cleared by the stream's own thread on stop/restart
+            if process is not None:
+                seen.add(process.pid)
+                cost = self._cpu_rate(process.pid)
+                if cost is not None and own is not None and running:
+                    cost += own / len(running)  # Decode/pipe share of this process
+            streams.append({
+                "key": key,
+                "status": manager.status_of(streamer),
+                "fps": streamer.fps,
+                "level": streamer.level,
+                "frames_sent": streamer.frames_sent,
+                "lag": manager.lags.get(streamer),
+                "cost": cost,
+            })
+        # Every restart or degrade step spawns a new FFmpeg; forget the old pids
+        for pid in set(self._cpu_marks) - seen:
+            del self._cpu_marks[pid]
+        return {"agent": self.name, "cpu": manager.cpu, "cores": os.cpu_count() or 1, "streams": streams}
+
+    def serve_forever(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"Stream agent listening on http://{self.name}")
+        while True:
+            self._wake.wait(1.0)
+            self._wake.clear()
+            if self._pending is not None:
+                config, self._pending = self._pending, None
+                self.manager.apply_config(config)
+            self.manager.check_load()
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.manager.stop_all_streams()
+
+
+# --------- Controller ---------
+class AgentState:
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self.alive = False
+        self.misses = 0
+        self.cores = 1
+        self.cpu = None
+        self.assigned = []  # Stream keys
+        self.pushed = None  # Assignment last accepted by the agent
+        self.report = {}  # key -> stream dict from the last /status
+
+
+class FleetController:
+    """Drop-in for MultiStreamManager that shards streams across agents"""
+
+    def __init__(self, agent_urls, poll_interval=2.0, imbalance=0.5):
+        self.agents = [AgentState(url) for url in agent_urls]
+        self.poll_interval = poll_interval
+        self.imbalance = imbalance  # Per-core load gap between agents that triggers a move
+        self.entries = {}  # key -> stream entry
+        self.costs = {}  # key -> EWMA cores
+        self.refusals = {}  # key -> {agent url: monotonic time it last refused the stream}
+        self._last_poll = 0.0
+        self.lock = threading.RLock()
+
+    # ----- cost model -----
+    def _cost(self, key):
+        if key in self.costs:
+            return self.costs[key]
+        return sum(self.costs.values()) / len(self.costs) if self.costs else DEFAULT_COST
+
+    def _refused(self, agent, key):
+        return agent.report.get(key, {}).get("status", "").startswith("Refused")
+
+    def _refused_lately(self, key, now):
+        return {url for url, at in self.refusals.get(key, {}).items() if now - at < REFUSED_RETRY}
+
+    def _full(self, agent, now):
+        """Agent refused some stream lately, so its low load is not headroom"""
+        return any(agent.url in self._refused_lately(key, now) for key in self.refusals)
+
+    def _load(self, agent):
+        # Refused streams are assigned but not running, so they cost nothing there
+        return sum(self._cost(key) for key in agent.assigned if not self._refused(agent, key)) / agent.cores
+
+    # ----- MultiStreamManager interface -----
+    def apply_config(self, config):
+        """Diff the fleet config and place new streams; moved/removed ones are pushed"""
+        with self.lock:
+            if config.get("agents"):
+                self._set_agents(config["agents"])
+            else:
+                print("WARNING: switching to a single-host fleet takes effect on the next restart")
+            self._poll()
+            entries = {stream_key(entry): entry for entry in config["streams"]}
+            for agent in self.agents:
+                agent.assigned = [key for key in agent.assigned if key in entries]
+            self.entries = entries
+            self.refusals = {key: urls for key, urls in self.refusals.items() if key in entries}
+            self._place_unassigned()
+            self._push()
+
+    def _set_agents(self, urls):
+        """Add and drop agents; a dropped agent's streams are stopped there and placed elsewhere"""
+        current = {agent.url: agent for agent in self.agents}
+        wanted = [url.rstrip("/") for url in urls]
+        for agent in self.agents:
+            if agent.url in wanted:
+                continue
+            print(f"Removing agent {agent.url}, reassigning {len(agent.assigned)} streams")
+            if agent.alive:
+                try:
+                    _request(f"{agent.url}/assign", {"streams": []})
+                except (OSError, urllib.error.URLError, ValueError) as e:
+                    print(f"WARNING: could not stop streams on {agent.url}: {e}")
+        for url in wanted:
+            if url not in current:
+                print(f"Adding agent {url}")
+        self.agents = [current.get(url) or AgentState(url) for url in dict.fromkeys(wanted)]
+
+    def check_load(self):
+        """Poll agents, fail over dead ones, nudge balance; call periodically"""
+        if time.monotonic() - self._last_poll < self.poll_interval:
+            return
+        with self.lock:
+            self._poll()
+            self._place_unassigned()
+            self._place_refused()
+            self._rebalance()
+            self._push()
+
+    def stop_all_streams(self):
+        with self.lock:
+            for agent in self.agents:
+                agent.assigned = []
+            self._push()
+
+    def stream_status(self):
+        status = self.status()
+        print("\n=== Fleet Status ===")
+        for agent in status["agents"]:
+            state = "alive" if agent["alive"] else "DEAD"
+            cpu = f"{agent['cpu']:.0%}" if agent["cpu"] is not None else "n/a"
+            print(f"Agent {agent['url']}: {state} cpu={cpu} load={agent['load']:.2f} "
+                  f"streams={len(agent['streams'])}")
+            for stream in agent["streams"]:
+                print(f"  {stream['key']}: {stream['status']} cost={stream['cost']:.2f} cores")
+        totals = status["totals"]
+        print(f"Total: {totals['live']}/{totals['streams']} live, "
+              f"{totals['unplaced']} unplaced, {totals['agents_alive']}/{len(self.agents)} agents alive")
+
+    def status(self):
+        """Aggregated fleet status and metrics as a dict"""
+        with self.lock:
+            agents = []
+            live = 0
+            for agent in self.agents:
+                streams = []
+                for key in agent.assigned:
+                    report = agent.report.get(key, {})
+                    stream_status = report.get("status", "Pending") if agent.alive else "Unknown"
+                    live += stream_status == "Live"
+                    streams.append({"key": key, "status": stream_status, "cost": self._cost(key),
+                                    "lag": report.get("lag"), "level": report.get("level")})
+                agents.append({"url": agent.url, "alive": agent.alive, "cpu": agent.cpu,
+                               "load": self._load(agent), "streams": streams})
+            placed = sum(len(agent.assigned) for agent in self.agents)
+            return {"agents": agents, "totals": {
+                "streams": len(self.entries),
+                "live": live,
+                "unplaced": len(self.entries) - placed,
+                "agents_alive": sum(agent.alive for agent in self.agents),
+            }}
+
+    # ----- internals -----
+    def _poll(self):
+        self._last_poll = time.monotonic()
+        for agent in self.agents:
+            try:
+                report = _request(f"{agent.url}/status")
+            except (OSError, urllib.error.URLError, ValueError):
+                agent.misses += 1
+                if agent.alive and agent.misses >= DEAD_AFTER:
+                    print(f"Agent {agent.url} is dead, reassigning {len(agent.assigned)} streams")
+                    agent.alive = False
+                    agent.assigned = []
+                    agent.pushed = None
+                continue
+
+            if not agent.alive:
+                print(f"Agent {agent.url} is alive")
+                agent.pushed = None  # Unknown state: push its assignment again
+            agent.alive = True
+            agent.misses = 0
+            agent.cores = report.get("cores", 1)
+            agent.report = {stream["key"]: stream for stream in report.get("streams", [])}
+            agent.cpu = report.get("cpu")
+            now = time.monotonic()
+            for stream in report.get("streams", []):
+                if stream["status"].startswith("Refused"):
+                    self.refusals.setdefault(stream["key"], {})[agent.url] = now
+                if stream.get("cost") is not None and stream["key"] in self.entries:
+                    previous = self.costs.get(stream["key"], stream["cost"])
+                    self.costs[stream["key"]] = previous + COST_SMOOTHING * (stream["cost"] - previous)
+
+        # Refusals only count as "full" for REFUSED_RETRY seconds
+        now = time.monotonic()
+        for key in list(self.refusals):
+            recent = {url: at for url, at in self.refusals[key].items() if now - at < REFUSED_RETRY}
+            if recent:
+                self.refusals[key] = recent
+            else:
+                del self.refusals[key]
+
+    def _place_unassigned(self):
+        alive = [agent for agent in self.agents if agent.alive]
+        if not alive:
+            return
+        now = time.monotonic()
+        targets = [agent for agent in alive if not self._full(agent, now)] or alive
+        placed = {key for agent in self.agents for key in agent.assigned}
+        # Most expensive first so greedy placement packs well
+        for key in sorted(set(self.entries) - placed, key=self._cost, reverse=True):
+            min(targets, key=self._load).assigned.append(key)
+
+    def _place_refused(self):
+        """Offer streams an agent refused to the least loaded agent that hasn't refused them lately"""
+        alive = [agent for agent in self.agents if agent.alive]
+        now = time.monotonic()
+        for agent in alive:
+            for key in [k for k in agent.assigned if self._refused(agent, k)]:
+                refused_by = self._refused_lately(key, now)
+                targets = [other for other in alive if other.url not in refused_by]
+                if not targets:
+                    continue  # Everyone is full: stays put, its agent admits it once there is headroom
+                target = min(targets, key=self._load)
+                agent.assigned.remove(key)
+                target.assigned.append(key)
+                print(f"Moving refused {key} from {agent.url} to {target.url}")
+
+    def _rebalance(self):
+        alive = [agent for agent in self.agents if agent.alive]
+        if len(alive) < 2:
+            return
+        now = time.monotonic()
+        busiest = max(alive, key=self._load)
+        open_agents = [agent for agent in alive if not self._full(agent, now)]
+        if not open_agents:
+            return
+        idlest = min(open_agents, key=self._load)
+        gap = self._load(busiest) - self._load(idlest)
+        movable = [key for key in busiest.assigned if not self._refused(busiest, key)]
+        if gap <= self.imbalance or not movable:
+            return
+        # Move the stream whose cost best halves the gap; one per tick avoids herds
+        key = min(movable, key=lambda k: abs(self._cost(k) / busiest.cores - gap / 2))
+        if self._cost(key) / idlest.cores >= gap:
+            return  # Moving it would just flip the imbalance
+        busiest.assigned.remove(key)
+        idlest.assigned.append(key)
+        print(f"Moving {key} from {busiest.url} to {idlest.url} (load gap {gap:.2f})")
+
+    def _push(self):
+        for agent in self.agents:
+            if not agent.alive:
+                continue
+            assignment = [self.entries[key] for key in agent.assigned]
+            if assignment == agent.pushed:
+                continue
+            try:
+                _request(f"{agent.url}/assign", {"streams": assignment})
+                agent.pushed = assignment
+            except (OSError, urllib.error.URLError, ValueError) as e:
+                print(f"WARNING: assignment to {agent.url} failed: {e}")
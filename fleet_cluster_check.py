@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Localhost check of FleetController against several fake agents.
+
+Each agent is a real StreamAgent (HTTP API, assignment thread) in front of a
+fake manager that "runs" whatever it is assigned without OpenCV or FFmpeg,
+so placement, failover, refused-stream re-placement and agent list edits
+can be exercised on any machine in a few seconds:
+
+    python fleet_cluster_check.py
+
+Exits non-zero if any check fails.
+"""
+import sys
+import threading
+import time
+
+from fleet_cluster import DEAD_AFTER, FleetController, StreamAgent
+from fleet_config import stream_key
+
+STREAMS = 9
+TIMEOUT = 10.0
+
+
+class FakeStreamer:
+    def __init__(self, entry, refused):
+        self.entry = entry
+        self.running = not refused
+        self.refused = refused
+        self.process = None  # No FFmpeg, so the controller keeps its default cost
+        self.fps = entry["fps"]
+        self.level = 0
+        self.frames_sent = 0
+
+
+class FakeManager:
+    """The parts of MultiStreamManager a StreamAgent uses; refuse=True models a full host"""
+
+    def __init__(self, refuse=False):
+        self.refuse = refuse
+        self.streamers = []
+        self.by_key = {}
+        self.lags = {}
+        self.cpu = 0.1
+
+    def apply_config(self, config):
+        self.by_key = {stream_key(entry): FakeStreamer(entry, self.refuse) for entry in config["streams"]}
+        self.streamers = list(self.by_key.values())
+
+    def status_of(self, streamer):
+        return "Refused (over capacity)" if streamer.refused else "Live"
+
+    def check_load(self):
+        pass
+
+    def stop_all_streams(self):
+        self.apply_config({"streams": []})
+
+
+def start_agent(refuse=False):
+    """StreamAgent on a free localhost port; returns (agent, url)"""
+    agent = StreamAgent(FakeManager(refuse), "127.0.0.1", 0)
+    threading.Thread(target=agent.serve_forever, daemon=True).start()
+    return agent, f"http://{agent.name}"
+
+
+def kill_agent(agent):
+    agent.server.shutdown()
+    agent.server.server_close()
+
+
+def fleet_config(urls):
+    streams = [{"rtsp_url": f"rtsp://127.0.0.1:8554/stream{i}", "video_path": "synthetic://", "fps": 25}
+               for i in range(STREAMS)]
+    return {"agents": urls, "streams": streams}
+
+
+def running_on(agents):
+    return [len(agent.manager.by_key) for agent in agents]
+
+
+def settle(controller, until, timeout=TIMEOUT):
+    """Tick the controller until until() holds; False on timeout"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        controller.check_load()
+        if until():
+            return True
+        time.sleep(controller.poll_interval)
+    return False
+
+
+failures = []
+
+
+def check(ok, message):
+    print(f"{'OK  ' if ok else 'FAIL'} {message}")
+    if not ok:
+        failures.append(message)
+
+
+def check_placement_and_failover():
+    agents, urls = zip(*[start_agent() for _ in range(3)])
+    controller = FleetController(urls, poll_interval=0.1)
+    controller.apply_config(fleet_config(list(urls)))
+
+    check(settle(controller, lambda: running_on(agents) == [3, 3, 3]),
+          f"placement spreads {STREAMS} streams evenly: {running_on(agents)}")
+
+    kill_agent(agents[0])
+    survivors = agents[1:]
+    check(settle(controller, lambda: sum(running_on(survivors)) == STREAMS),
+          f"failover after {DEAD_AFTER} missed polls moves every stream to live agents: {running_on(survivors)}")
+    check(not controller.agents[0].alive and not controller.agents[0].assigned,
+          "dead agent is marked dead and holds no streams")
+    for agent in survivors:
+        kill_agent(agent)
+
+
+def check_refused_replacement():
+    agents, urls = zip(*[start_agent(refuse) for refuse in (True, False, False)])
+    controller = FleetController(urls, poll_interval=0.1)
+    controller.apply_config(fleet_config(list(urls)))
+
+    full = controller.agents[0]
+    check(settle(controller, lambda: not full.assigned and sum(running_on(agents[1:])) == STREAMS),
+          f"streams refused by a full agent are placed on the others: {running_on(agents)}")
+
+    # Let the rebalancer run for a while: the full agent must not get them back
+    before = [sorted(agent.assigned) for agent in controller.agents]
+    settle(controller, lambda: False, timeout=1.0)
+    after = [sorted(agent.assigned) for agent in controller.agents]
+    check(before == after, "no streams move back onto the full agent")
+    for agent in agents:
+        kill_agent(agent)
+
+
+def check_agent_list_edits():
+    agents, urls = zip(*[start_agent() for _ in range(3)])
+    controller = FleetController(urls[:2], poll_interval=0.1)
+    controller.apply_config(fleet_config(list(urls[:2])))
+    check(settle(controller, lambda: sum(running_on(agents[:2])) == STREAMS),
+          f"two agents hold the fleet: {running_on(agents)}")
+
+    # Drop the first agent and add the third in one edit
+    controller.apply_config(fleet_config(list(urls[1:])))
+    moved = lambda: running_on(agents)[0] == 0 and running_on(agents)[2] and sum(running_on(agents)) == STREAMS
+    check(settle(controller, moved),
+          f"agent list edit stops streams on the removed agent and uses the added one: {running_on(agents)}")
+    check([agent.url for agent in controller.agents] == list(urls[1:]), "controller tracks the new agent list")
+    for agent in agents:
+        kill_agent(agent)
+
+
+def main():
+    check_placement_and_failover()
+    check_refused_replacement()
+    check_agent_list_edits()
+    if failures:
+        print(f"{len(failures)} check(s) failed")
+        sys.exit(1)
+    print("All fleet checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import json
+import os
+
+from frame_queue import POLICIES
+
+try:
+    import yaml  # Optional: only needed for .yml/.yaml configs
+except ImportError:
+    yaml = None
+
+# ====== DEFAULTS ======
+DEFAULT_CONFIG = "fleet.json"
+STREAM_DEFAULTS = {
+    "fps": 25,
+    "latency_stamp": False,
+    "queue_size": 4,
+    "queue_policy": "drop_oldest",  # block | drop_oldest | duplicate_last
+    "hls_dir": None,  # Also write fMP4 HLS here from the same encode
+    "width": 640,
+    "height": 480,
+    "priority": 0,  # Streams with priority >= 1 are never degraded under load
+}
+DEVICE_DEFAULTS = {
+    "ip": "192.168.1.100",
+    "http_port": 8080,
+    "rtsp_port": 554,
+    "username": "admin",
+    "password": "admin@123",
+    "profile_token": "Profile_1",
+    "fps": 25,
+    "width": 640,
+    "height": 480,
+    "latency_stamp": False,
+    "snapshot_interval": 1.0,
+    "preview_fps": 10,
+    "hls_dir": None,
+    "motion_events": True,
+    # {"group": "239.255.0.1", "port": 5004, "ttl": 1, "rtsp_port": 8555} to also send RTP multicast
+    "multicast": None,
+}
+# ======================
+
+
+def _text(value):
+    return isinstance(value, str) and value != ""
+
+
+def _flag(value):
+    return isinstance(value, bool)
+
+
+def _count(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 1
+
+
+def _positive(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+
+
+def _port(value):
+    return _count(value) and value <= 65535
+
+
+def _multicast(value):
+    if value is None:
+        return True
+    return (isinstance(value, dict) and _text(value.get("group")) and _port(value.get("port"))
+            and _count(value.get("ttl", 1)) and _port(value.get("rtsp_port", 8555)))
+
+
+# field -> (check, what a valid value looks like); a bad value rejects the whole file
+COMMON_CHECKS = {
+    "fps": (_positive, "a positive number"),
+    "width": (_count, "a positive integer"),
+    "height": (_count, "a positive integer"),
+    "latency_stamp": (_flag, "true or false"),
+    "hls_dir": (lambda v: v is None or _text(v), "a directory or null"),
+}
+STREAM_CHECKS = {
+    **COMMON_CHECKS,
+    "video_path": (_text, "a path"),
+    "rtsp_url": (_text, "a URL"),
+    "queue_size": (_count, "an integer of at least 1"),
+    "queue_policy": (lambda v: v in POLICIES, f"one of {', '.join(POLICIES)}"),
+    "priority": (lambda v: isinstance(v, int) and not isinstance(v, bool), "an integer"),
+}
+DEVICE_CHECKS = {
+    **COMMON_CHECKS,
+    "name": (_text, "a string"),
+    "input_file": (_text, "a path"),
+    "ip": (_text, "an address"),
+    "http_port": (_port, "a port number"),
+    "rtsp_port": (_port, "a port number"),
+    "username": (lambda v: isinstance(v, str), "a string"),
+    "password": (lambda v: isinstance(v, str), "a string"),
+    "profile_token": (_text, "a string"),
+    "snapshot_interval": (_positive, "a positive number"),
+    "preview_fps": (_positive, "a positive number"),
+    "motion_events": (_flag, "true or false"),
+    "multicast": (_multicast, 'null or {"group", "port"[, "ttl", "rtsp_port"]}'),
+}
+
+
+def _validate(entries, checks, key, kind):
+    for entry in entries:
+        for field, (check, expected) in checks.items():
+            if not check(entry[field]):
+                raise ValueError(f"{kind} {key(entry)} has invalid {field} {entry[field]!r}, expected {expected}")
+
+
+def _normalize(entries, defaults, required, kind):
+    normalized = []
+    for entry in entries:
+        missing = [field for field in required if field not in entry]
+        if missing:
+            raise ValueError(f"{kind} entry {entry!r} is missing {', '.join(missing)}")
+        normalized.append({**defaults, **entry})
+    return normalized
+
+
+def stream_key(entry):
+    """Identity of a stream entry: its explicit name, else its publish URL"""
+    return entry.get("name") or entry["rtsp_url"]
+
+
+def device_key(entry):
+    return entry["name"]
+
+
+def load_config(path):
+    """Load a fleet config (JSON, or YAML when PyYAML is installed)"""
+    with open(path) as f:
+        text = f.read()
+
+    if str(path).endswith((".yml", ".yaml")):
+        if yaml is None:
+            raise RuntimeError(f"PyYAML is required to read {path} (pip install pyyaml)")
+        config = yaml.safe_load(text) or {}
+    else:
+        config = json.loads(text)
+
+    config["streams"] = _normalize(config.get("streams", []), STREAM_DEFAULTS,
+                                   ("video_path", "rtsp_url"), "Stream")
+    config["devices"] = _normalize(config.get("devices", []), DEVICE_DEFAULTS,
+                                   ("name", "input_file"), "Device")
+
+    _validate(config["streams"], STREAM_CHECKS, stream_key, "Stream")
+    _validate(config["devices"], DEVICE_CHECKS, device_key, "Device")
+    agents = config.get("agents", [])
+    if not isinstance(agents, list) or not all(_text(url) for url in agents):
+        raise ValueError(f"agents must be a list of agent URLs, got {agents!r}")
+
+    for entries, key, kind in ((config["streams"], stream_key, "stream"),
+                               (config["devices"], device_key, "device")):
+        keys = [key(entry) for entry in entries]
+        duplicates = sorted({k for k in keys if keys.count(k) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate {kind} entries: {', '.join(duplicates)}")
+    return config
+
+
+def diff_entries(old, new, key=stream_key):
+    """Return (added, removed, changed) entries between two config lists"""
+    old_by_key = {key(entry): entry for entry in old}
+    new_by_key = {key(entry): entry for entry in new}
+    added = [entry for k, entry in new_by_key.items() if k not in old_by_key]
+    removed = [entry for k, entry in old_by_key.items() if k not in new_by_key]
+    changed = [entry for k, entry in new_by_key.items()
+               if k in old_by_key and old_by_key[k] != entry]
+    return added, removed, changed
+
+
+class ConfigWatcher:
+    """Poll a config file and pass the new config to a callback when it changes"""
+
+    def __init__(self, path, on_change):
+        self.path = path
+        self.on_change = on_change
+        self.mtime = self._mtime()
+
+    def _mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def check(self):
+        """Reload if the file changed; a broken edit keeps the running config"""
+        mtime = self._mtime()
+        if mtime is None or mtime == self.mtime:
+            return False
+        self.mtime = mtime
+        try:
+            config = load_config(self.path)
+        except Exception as e:
+            print(f"WARNING: ignoring invalid config {self.path}: {e}")
+            return False
+        try:
+            self.on_change(config)
+        except Exception as e:
+            print(f"WARNING: could not apply {self.path}, previous config stays in force: {e}")
+            return False
+        return True
@@ -0,0 +1,84 @@
+import collections
+import threading
+import time
+
+POLICIES = ("block", "drop_oldest", "duplicate_last")
+
+
+class FrameQueue:
+    """Small bounded ring of frames between a decode thread and a writer thread.
+
+    Policies:
+      block          - decoder waits for space, writer waits for a frame
+      drop_oldest    - decoder evicts the oldest queued frame when full
+      duplicate_last - as drop_oldest, and the writer repeats its last frame
+                       when nothing arrives within its timeout so output
+                       fps holds
+    """
+
+    def __init__(self, maxsize=4, policy="drop_oldest"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy {policy!r}, expected one of {', '.join(POLICIES)}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.frames = collections.deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.last = None
+        # Policy action counters
+        self.blocked = 0
+        self.dropped = 0
+        self.duplicated = 0
+
+    def put(self, frame):
+        """Queue a decoded frame; returns False once the queue is closed"""
+        with self.cond:
+            if len(self.frames) >= self.maxsize:
+                if self.policy == "block":
+                    self.blocked += 1
+                    while len(self.frames) >= self.maxsize and not self.closed:
+                        self.cond.wait()
+                else:
+                    self.frames.popleft()
+                    self.dropped += 1
+            if self.closed:
+                return False
+            self.frames.append(frame)
+            self.cond.notify_all()
+            return True
+
+    def get(self, timeout):
+        """Next frame for the writer, or None if nothing arrived within timeout"""
+        with self.cond:
+            deadline = time.monotonic() + timeout
+            while not self.frames and not self.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+            if not self.frames:
+                # Only a frame that is late by a whole tick is repeated;
+                # scheduling jitter between the two threads is waited out
+                if not self.closed and self.policy == "duplicate_last" and self.last is not None:
+                    self.duplicated += 1
+                    return self.last
+                return None
+
+            self.last = self.frames.popleft()
+            self.cond.notify_all()
+            return self.last
+
+    def close(self):
+        """Wake both sides and refuse further frames"""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def stats(self):
+        with self.cond:
+            return {
+                "depth": len(self.frames),
+                "blocked": self.blocked,
+                "dropped": self.dropped,
+                "duplicated": self.duplicated,
+            }
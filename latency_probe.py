@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Glass-to-glass latency measurement via a pixel barcode stamped into each frame.
+
+The streamer side calls stamp_frame() right before a frame is handed to the
+encoder. The receiver side (run this file) pulls one or more RTSP streams,
+reads the barcode back and compares it with the local wall clock, so sender
+and receiver must share a clock (same host, or NTP-synced hosts).
+
+    python latency_probe.py rtsp://127.0.0.1:8554/stream1 rtsp://127.0.0.1:8554/stream2 -d 30
+"""
+import argparse
+import math
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Barcode layout: one band of cells across the full width of the frame top.
+# [white ref][black ref][40 bit wallclock ms][16 bit sequence][8 bit checksum]
+# Geometry is proportional to the frame size so the code survives the
+# encoder's scale filter (e.g. 1080p source -> 640x480 output).
+TS_BITS = 40
+SEQ_BITS = 16
+SUM_BITS = 8
+DATA_BITS = TS_BITS + SEQ_BITS + SUM_BITS
+CELLS = DATA_BITS + 2
+TS_MOD = 1 << TS_BITS
+SEQ_MOD = 1 << SEQ_BITS
+BAND_FRACTION = 1 / 32  # Band height as a fraction of frame height
+
+_SHIFTS = np.arange(DATA_BITS - 1, -1, -1, dtype=np.uint64)
+
+
+def _checksum(ts_ms, seq):
+    value = (ts_ms << SEQ_BITS) | seq
+    total = 0
+    while value:
+        total ^= value & 0xFF
+        value >>= 8
+    return total
+
+
+def _band_height(frame_height):
+    return max(int(frame_height * BAND_FRACTION), 4)
+
+
+def stamp_frame(frame, seq, ts_ms=None):
+    """Draw the barcode for (wallclock ms, seq) into the top rows of a BGR frame in place"""
+    if ts_ms is None:
+        ts_ms = int(time.time() * 1000)
+    ts_ms %= TS_MOD
+    seq %= SEQ_MOD
+    word = (ts_ms << (SEQ_BITS + SUM_BITS)) | (seq << SUM_BITS) | _checksum(ts_ms, seq)
+    bits = (np.uint64(word) >> _SHIFTS) & np.uint64(1)
+
+    height, width = frame.shape[:2]
+    levels = np.concatenate(([255, 0], bits.astype(np.uint8) * 255)).astype(np.uint8)
+    row = levels[(np.arange(width) * CELLS) // width]
+    frame[:_band_height(height)] = row[None, :, None]
+    return frame
+
+
+def read_stamp(frame):
+    """Return (wallclock ms, seq) from a stamped frame, or None if unreadable"""
+    height, width = frame.shape[:2]
+    if width < CELLS * 4:
+        return None
+
+    # Sample the middle of each cell to stay clear of chroma/blocking at edges
+    band = _band_height(height)
+    rows = frame[band // 4:band - band // 4]
+    gray = rows.mean(axis=(0, 2)) if rows.ndim == 3 else rows.mean(axis=0)
+    cell = width / CELLS
+    centers = ((np.arange(CELLS) + 0.5) * cell).astype(int)
+    offsets = np.arange(-int(cell // 4), int(cell // 4) + 1)
+    cells = gray[np.clip(centers[:, None] + offsets[None, :], 0, width - 1)].mean(axis=1)
+
+    white, black = cells[0], cells[1]
+    if white - black < 64:
+        return None
+    bits = (cells[2:] > (white + black) / 2).astype(np.uint64)
+    word = int((bits << _SHIFTS).sum())
+
+    checksum = word & ((1 << SUM_BITS) - 1)
+    seq = (word >> SUM_BITS) & (SEQ_MOD - 1)
+    ts_ms = word >> (SEQ_BITS + SUM_BITS)
+    if checksum != _checksum(ts_ms, seq):
+        return None
+    return ts_ms, seq
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100.0 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class LatencyProbe(threading.Thread):
+    """Pull one RTSP stream and collect latency and sequence gap statistics"""
+
+    def __init__(self, rtsp_url, duration):
+        super().__init__(daemon=True)
+        self.rtsp_url = rtsp_url
+        self.duration = duration
+        self.latencies_ms = []
+        self.frames = 0
+        self.unreadable = 0
+        self.skewed = 0  # Stamps from the future: receiver clock behind the sender
+        self.gaps = 0
+        self.missing = 0
+        self.error = None
+
+    def run(self):
+        cap = cv2.VideoCapture(self.rtsp_url)
+        if not cap.isOpened():
+            self.error = "cannot open stream"
+            return
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        last_seq = None
+        end = time.time() + self.duration
+        while time.time() < end:
+            ret, frame = cap.read()
+            now_ms = int(time.time() * 1000)
+            if not ret:
+                self.error = "stream ended"
+                break
+            self.frames += 1
+
+            stamp = read_stamp(frame)
+            if stamp is None:
+                self.unreadable += 1
+                continue
+            ts_ms, seq = stamp
+            # The stamp only keeps the low TS_BITS of the clock; a difference
+            # in the upper half of the range is a negative one, not ~35 years
+            latency = (now_ms - ts_ms) % TS_MOD
+            if latency >= TS_MOD // 2:
+                self.skewed += 1
+            else:
+                self.latencies_ms.append(latency)
+
+            if last_seq is not None:
+                step = (seq - last_seq) % SEQ_MOD
+                if step > 1:
+                    self.gaps += 1
+                    self.missing += step - 1
+            last_seq = seq
+        cap.release()
+
+    def report(self):
+        lat = self.latencies_ms
+        line = (f"{self.rtsp_url}: frames={self.frames} stamped={len(lat)} unreadable={self.unreadable} "
+                f"p50={percentile(lat, 50):.0f}ms p99={percentile(lat, 99):.0f}ms "
+                f"max={max(lat, default=float('nan')):.0f}ms gaps={self.gaps} missing={self.missing}")
+        if self.skewed:
+            line += f" skewed={self.skewed} (receiver clock behind sender, check NTP)"
+        if self.error:
+            line += f" ({self.error})"
+        return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure end-to-end latency of stamped RTSP streams")
+    parser.add_argument("urls", nargs="+", help="RTSP URLs published with latency stamping enabled")
+    parser.add_argument("-d", "--duration", type=float, default=30.0, help="seconds to measure")
+    args = parser.parse_args()
+
+    probes = [LatencyProbe(url, args.duration) for url in args.urls]
+    for probe in probes:
+        probe.start()
+    for probe in probes:
+        probe.join()
+
+    print("\n=== Latency Report ===")
+    for probe in probes:
+        print(probe.report())
+
+
+if __name__ == "__main__":
+    main()
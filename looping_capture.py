@@ -0,0 +1,113 @@
+import collections
+import threading
+
+import cv2
+
+from synthetic_source import is_synthetic, open_capture
+
+
+class LoopingCapture:
+    """Plays a video file in an endless loop without ever seeking.
+
+    While one lap plays, a background thread opens a second reader on the
+    same file and pre-decodes the first `prefetch` frames of the next lap.
+    At end of file read() switches to that reader, so the lap boundary costs
+    a deque pop instead of a blocking seek, and there is no per-frame
+    position polling.
+    """
+
+    def __init__(self, path, prefetch=8):
+        self.path = str(path)
+        self.prefetch = prefetch
+        self.cap = cv2.VideoCapture(self.path)
+        self.pending = collections.deque()  # Prefetched frames of the current lap
+        self.laps = 0
+        self.frame_index = -1  # Position of the last returned frame within its lap
+        self._next = None
+        self._next_thread = None
+        if self.cap.isOpened():
+            self._start_prefetch()
+
+    def _prefetch(self):
+        cap = cv2.VideoCapture(self.path)
+        frames = []
+        while cap.isOpened() and len(frames) < self.prefetch:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        self._next = (cap, frames)
+
+    def _start_prefetch(self):
+        self._next = None
+        self._next_thread = threading.Thread(target=self._prefetch, daemon=True)
+        self._next_thread.start()
+
+    # ----- cv2.VideoCapture interface -----
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def read(self):
+        if self.pending:
+            self.frame_index += 1
+            return True, self.pending.popleft()
+        if self.cap is None:
+            return False, None
+
+        ret, frame = self.cap.read()
+        if ret:
+            self.frame_index += 1
+            return True, frame
+
+        # End of lap: switch to the reader that has been warming up meanwhile
+        self._next_thread.join()
+        cap, frames = self._next
+        self.cap.release()
+        self.cap = cap
+        if not frames:
+            return False, None  # File became unreadable
+        self.pending.extend(frames)
+        self.laps += 1
+        self.frame_index = 0
+        self._start_prefetch()
+        return True, self.pending.popleft()
+
+    def grab(self):
+        """Advance one frame, skipping the colour conversion where possible"""
+        if self.pending:
+            self.frame_index += 1
+            self.pending.popleft()
+            return True
+        if self.cap is not None and self.cap.grab():
+            self.frame_index += 1
+            return True
+        return self.read()[0]  # End of lap: read() switches to the next reader
+
+    def get(self, prop):
+        return self.cap.get(prop) if self.cap is not None else 0.0
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value) if self.cap is not None else False
+
+    def release(self):
+        if self._next_thread is not None:
+            self._next_thread.join(timeout=5)
+            if self._next is not None:
+                self._next[0].release()
+            self._next = None
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        self.pending.clear()
+
+
+def open_source(path, prefetch=8, hold=None, fps=None):
+    """Endless frame source: rendered for synthetic:// paths, gapless loop for files.
+
+    `hold` is how many returned frames the consumer may still reference;
+    file frames are fresh arrays, rendered ones come from a ring sized for it.
+    `fps` is the rate frames are read at, which sets a rendered source's clock.
+    """
+    if is_synthetic(path):
+        return open_capture(path, hold, fps)
+    return LoopingCapture(path, prefetch)
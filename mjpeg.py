@@ -0,0 +1,98 @@
+import queue
+import threading
+import time
+
+import cv2
+
+BOUNDARY = "frame"
+
+
+class MJPEGBroadcaster:
+    """Encodes the live frame once per preview tick and fans it out to all viewers.
+
+    Frames are taken from a SnapshotSlot (the streamer already publishes
+    there), so the hot loop pays nothing extra. Each viewer gets a small
+    bounded queue; a viewer that can't keep up has its oldest JPEG replaced
+    instead of slowing the encoder or the other viewers. The encoder thread
+    only runs while at least one viewer is connected.
+    """
+
+    def __init__(self, source, fps=10, quality=70, client_queue=2):
+        self.source = source
+        self.fps = fps
+        self.quality = quality
+        self.client_queue = client_queue
+        self.clients = set()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.encodes = 0
+        self.skipped = 0
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.client_queue)
+        with self.lock:
+            self.clients.add(q)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._encode_loop, daemon=True)
+                self.thread.start()
+        return q
+
+    def unsubscribe(self, q):
+        with self.lock:
+            self.clients.discard(q)
+
+    def _encode_loop(self):
+        last_seq = None
+        next_tick = time.monotonic()
+        while True:
+            with self.lock:
+                if not self.clients:
+                    self.thread = None
+                    return
+                clients = list(self.clients)
+
+            frame, seq = self.source.frame, self.source.frame_seq
+            if frame is not None and seq != last_seq:
+                ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                if ok:
+                    data = buf.tobytes()
+                    self.encodes += 1
+                    last_seq = seq
+                    for q in clients:
+                        try:
+                            q.put_nowait(data)
+                        except queue.Full:
+                            # Slow viewer: drop its stale frame rather than wait
+                            self.skipped += 1
+                            try:
+                                q.get_nowait()
+                                q.put_nowait(data)
+                            except (queue.Empty, queue.Full):
+                                pass
+
+            next_tick += 1.0 / self.fps
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()
+
+    def serve(self, handler, idle_timeout=5.0):
+        """Stream multipart MJPEG to one HTTP client until it disconnects"""
+        q = self.subscribe()
+        try:
+            handler.send_response(200)
+            handler.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+            handler.send_header("Cache-Control", "no-cache")
+            handler.end_headers()
+            while True:
+                try:
+                    data = q.get(timeout=idle_timeout)
+                except queue.Empty:
+                    return  # Stream stalled (e.g. restarted); client will reconnect
+                handler.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data + b"\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.unsubscribe(q)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Precomputed per-frame motion activity for looping clips.
+
+The clip is decoded once, downscaled to grey thumbnails and frame-differenced
+in vectorized chunks. The result (one uint8 activity value per frame) is
+cached next to the clip as <clip>.motion.npz, keyed on the clip's size and
+mtime, so every later lap and every later run costs a dictionary lookup.
+
+    python motion_index.py videos/*.mp4      # prebuild caches
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+THUMB_SIZE = (160, 120)
+PIXEL_THRESHOLD = 25  # Grey-level change that counts as a moving pixel
+CHUNK = 256  # Frames differenced per vectorized step
+MOTION_ON = 0.02  # Fraction of moving pixels that starts a motion event
+MOTION_OFF = 0.005  # ... and that ends it (hysteresis)
+
+
+def index_path(video_path):
+    return f"{video_path}.motion.npz"
+
+
+def _activity(chunk, previous):
+    """Moving-pixel fraction per frame for a (n, h, w) uint8 chunk, scaled to 0..255"""
+    frames = chunk.astype(np.int16)
+    if previous is None:
+        diffs = np.abs(np.diff(frames, axis=0, prepend=frames[:1]))
+    else:
+        diffs = np.abs(np.diff(frames, axis=0, prepend=previous[None].astype(np.int16)))
+    moving = (diffs > PIXEL_THRESHOLD).mean(axis=(1, 2))
+    return np.round(moving * 255).astype(np.uint8)
+
+
+def build_index(video_path):
+    """Decode a clip once and return its per-frame activity as a uint8 array"""
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise OSError(f"Cannot open video file: {video_path}")
+
+    activity = []
+    chunk = []
+    previous = None
+    while True:
+        ret, frame = cap.read()
+        if ret:
+            thumb = cv2.resize(frame, THUMB_SIZE, interpolation=cv2.INTER_AREA)
+            chunk.append(cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY))
+        if chunk and (len(chunk) == CHUNK or not ret):
+            stack = np.stack(chunk)
+            activity.append(_activity(stack, previous))
+            previous = stack[-1]
+            chunk = []
+        if not ret:
+            break
+    cap.release()
+    return np.concatenate(activity) if activity else np.zeros(0, dtype=np.uint8)
+
+
+def load_or_build(video_path):
+    """Per-frame activity for a clip, from the on-disk cache when it is current"""
+    stat = os.stat(video_path)
+    path = index_path(video_path)
+    try:
+        with np.load(path) as cached:
+            if int(cached["size"]) == stat.st_size and int(cached["mtime_ns"]) == stat.st_mtime_ns:
+                return cached["activity"]
+    except (OSError, KeyError, ValueError):
+        pass
+
+    activity = build_index(video_path)
+    tmp = path + ".tmp.npz"
+    try:
+        np.savez_compressed(tmp, activity=activity, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        os.replace(tmp, path)
+    except OSError as e:
+        # e.g. read-only clip directory: the index still serves this run
+        print(f"WARNING: cannot cache motion index at {path}: {e}")
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+    return activity
+
+
+def transitions(activity, on=MOTION_ON, off=MOTION_OFF):
+    """Map frame index -> new motion state (True/False) at each flip.
+
+    The clip loops, so the hysteresis runs twice: the state entering frame 0
+    is the one the previous lap ended in, and frame 0 only appears if the
+    state actually flips across the lap boundary.
+    """
+    on_level, off_level = on * 255, off * 255
+    states = np.zeros(len(activity), dtype=bool)
+    state = False
+    for _ in range(2):  # Second pass settles the wrap-around state
+        for i, value in enumerate(activity):
+            if not state and value >= on_level:
+                state = True
+            elif state and value <= off_level:
+                state = False
+            states[i] = state
+    if not len(states):
+        return {}
+    flips = np.flatnonzero(states != np.roll(states, 1))
+    return {int(i): bool(states[i]) for i in flips}
+
+
+def state_at(changes, frame_index):
+    """Motion state in force at a frame index, given transitions()"""
+    if not changes:
+        return False
+    starts = [i for i in changes if i <= frame_index]
+    return changes[max(starts)] if starts else changes[max(changes)]
+
+
+if __name__ == "__main__":
+    for clip in sys.argv[1:]:
+        act = load_or_build(clip)
+        print(f"{clip}: {len(act)} frames, {len(transitions(act))} motion transitions -> {index_path(clip)}")
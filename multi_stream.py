@@ -3,18 +3,61 @@ import subprocess
 import time
 import threading
 import os
+import argparse
+import concurrent.futures
+import urllib.parse
 from pathlib import Path
 
+from ipStream import wait_port
+from latency_probe import stamp_frame
+from frame_queue import FrameQueue
+from synthetic_source import is_synthetic
+from looping_capture import open_source
+from stream_outputs import build_output_args
+from admission import COST_SMOOTHING, QUALITY_LEVELS, STREAM_CORES, LoadMonitor, sample_cpu
+from profiling import StageTimer, install_signal_trigger
+from fleet_config import DEFAULT_CONFIG, ConfigWatcher, diff_entries, load_config, stream_key
+from fleet_cluster import FleetController, StreamAgent
+
+# Failed streams are retried after RETRY_BASE seconds, doubling per
+# consecutive failure up to RETRY_MAX
+RETRY_BASE = 5
+RETRY_MAX = 300
+
 class RTSPStreamer:
-    def __init__(self, video_path, rtsp_url, fps=25, stream_id=1):
+    def __init__(self, video_path, rtsp_url, fps=25, stream_id=1, latency_stamp=False,
+                 queue_size=4, queue_policy="drop_oldest", hls_dir=None, width=640, height=480,
+                 priority=0):
         self.video_path = video_path
         self.rtsp_url = rtsp_url
         self.fps = fps
+        self.width = width
+        self.height = height
         self.stream_id = stream_id
+        self.priority = priority
+        self.base = (fps, width, height)  # Full-quality settings
+        self.level = 0  # Index into admission.QUALITY_LEVELS
+        self.refused = False  # Held back by admission control
+        self.latency_stamp = latency_stamp  # Embed a wallclock barcode for latency_probe.py
+        self.frames_sent = 0
+        self.queue_size = queue_size
+        self.queue_policy = queue_policy
+        self.hls_dir = hls_dir  # Optional fMP4 HLS output from the same encode
+        self.frames = None  # FrameQueue between the decode and write stages
+        self.decoder = None
+        self.timer = StageTimer()  # Per-stage hot loop histograms
         self.running = False
+        self.failed = False  # Went down on its own rather than via stop_stream
+        self.fatal = False  # Failed in a way a retry cannot fix (source missing or unreadable)
+        self.failures = 0  # Consecutive failures since the stream was last live
+        self.retry_at = None  # time.monotonic() after which a failed stream may be restarted
         self.thread = None
-        self.process = None
-        self.cap = None
+        self.process = None  # Current run's FFmpeg, for status only; each run owns its own
+        self._stop = None  # Per-run stop Event, so an old run can't outlive a restart
+        self._run_lock = threading.Lock()  # Orders stopping a run against it publishing state
+        self.live_event = threading.Event()
+        self.started_at = None
+        self.live_at = None
         
     def start_stream(self):
         """Start the RTSP streaming in a separate thread"""
@@ -23,45 +66,113 @@ class RTSPStreamer:
             return
             
         self.running = True
-        self.thread = threading.Thread(target=self._stream_loop, daemon=True)
+        self.failed = False
+        self.fatal = False
+        self.live_event.clear()
+        self.started_at = time.time()
+        self.live_at = None
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._stream_loop, args=(self._stop,), daemon=True)
         self.thread.start()
         print(f"Started stream {self.stream_id}: {self.video_path} -> {self.rtsp_url}")
         
     def stop_stream(self):
         """Stop the RTSP streaming"""
         self.running = False
-        if self.thread and self.thread.is_alive():
-            self.thread.join(timeout=2)
-        self._cleanup()
+        with self._run_lock:
+            if self._stop:
+                self._stop.set()
+            if self.frames:
+                self.frames.close()  # Wake a writer waiting on an empty queue
+        thread = self.thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=2)
+            process = self.process
+            if thread.is_alive() and process:
+                # Blocked writing to a stalled encoder: killing it breaks the pipe
+                process.kill()
+                thread.join(timeout=5)
         print(f"Stopped stream {self.stream_id}")
         
-    def _stream_loop(self):
-        """Main streaming loop"""
+    def set_level(self, level):
+        """Re-encode at a QUALITY_LEVELS step (0 = full quality), restarting if running"""
+        fps_factor, size_factor = QUALITY_LEVELS[level]
+        fps, width, height = self.base
+        was_running = self.running
+        if was_running:
+            self.stop_stream()
+        self.level = level
+        self.fps = max(1, round(fps * fps_factor))
+        self.width = int(width * size_factor) // 2 * 2  # yuv420p needs even sizes
+        self.height = int(height * size_factor) // 2 * 2
+        print(f"Stream {self.stream_id} at level {level}: {self.width}x{self.height}@{self.fps}")
+        if was_running:
+            self.start_stream()
+        
+    def wait_until_live(self, timeout=None):
+        """Block until the first keyframe has been pushed; False on failure or timeout"""
+        deadline = None if timeout is None else time.time() + timeout
+        while not self.live_event.wait(0.1):
+            if not (self.thread and self.thread.is_alive()):
+                return False
+            if deadline is not None and time.time() >= deadline:
+                return False
+        return True
+        
+    def _watch_progress(self, process, stop):
+        """Mark the stream live once FFmpeg reports its first encoded frame"""
+        # With a fixed GOP the first encoded frame is always an IDR, and the
+        # RTSP muxer only emits frames after RECORD succeeded, so frame>0 in
+        # the progress report means a keyframe reached the server.
+        for line in process.stdout:
+            if self.live_event.is_set() or not line.startswith(b'frame='):
+                continue
+            try:
+                frames = int(line[len(b'frame='):])
+            except ValueError:
+                continue
+            if frames > 0 and not stop.is_set():
+                self.failures = 0
+                self.live_at = time.time()
+                self.live_event.set()
+                print(f"Stream {self.stream_id} live after {self.live_at - self.started_at:.2f}s")
+        
+    def _stream_loop(self, stop):
+        """Main streaming loop; runs until its own stop Event is set"""
+        cap = process = frames = decoder = None
+        fatal = False
         try:
-            # Check if video file exists
-            if not os.path.exists(self.video_path):
+            # Check if video file exists (synthetic:// sources are rendered)
+            if not is_synthetic(self.video_path) and not os.path.exists(self.video_path):
                 print(f"Error: Video file not found for stream {self.stream_id}: {self.video_path}")
+                fatal = True
                 return
                 
-            # OpenCV video capture
-            self.cap = cv2.VideoCapture(self.video_path)
-            if not self.cap.isOpened():
+            # OpenCV video capture, read at the full-quality rate (degraded
+            # levels skip frames, see _decode_loop). hold covers the queued
+            # frames plus the one being written and the last one kept for
+            # duplicate_last
+            cap = open_source(self.video_path, hold=self.queue_size + 2, fps=self.base[0])
+            if not cap.isOpened():
                 print(f"Error: Cannot open video file for stream {self.stream_id}: {self.video_path}")
+                fatal = True
                 return
                 
-            width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
             
             # FFmpeg command for H.264 streaming with 480p output
             ffmpeg_cmd = [
                 'ffmpeg',
+                '-nostats',
+                '-progress', 'pipe:1',  # Readiness probe (see _watch_progress)
                 '-re',
                 '-f', 'rawvideo',
                 '-pix_fmt', 'bgr24',
                 '-s', f'{width}x{height}',
                 '-r', str(self.fps),
                 '-i', '-',
-                '-vf', 'scale=640:480,format=yuv420p',  # Scale to 480p
+                '-vf', f'scale={self.width}:{self.height},format=yuv420p',  # 480p unless degraded
                 '-c:v', 'libx264',
                 '-profile:v', 'baseline',
                 '-level:v', '3.1',
@@ -73,38 +184,53 @@ class RTSPStreamer:
                 '-b:v', '1000k',  # Bitrate for 480p
                 '-maxrate', '1200k',
                 '-bufsize', '2000k',
-                '-f', 'rtsp',
-                '-rtsp_transport', 'tcp',
-                self.rtsp_url
+                *build_output_args(self.rtsp_url, self.hls_dir)
             ]
             
             # Start FFmpeg subprocess
-            self.process = subprocess.Popen(
+            process = subprocess.Popen(
                 ffmpeg_cmd, 
                 stdin=subprocess.PIPE,
-                stdout=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
                 stderr=subprocess.DEVNULL
             )
+            threading.Thread(target=self._watch_progress, args=(process, stop), daemon=True).start()
             
             frame_time = 1.0 / self.fps
             
-            # Main streaming loop
-            while self.running and self.cap.isOpened():
-                # Loop video when it ends
-                if self.cap.get(cv2.CAP_PROP_POS_FRAMES) >= self.cap.get(cv2.CAP_PROP_FRAME_COUNT) - 1:
-                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                
-                ret, frame = self.cap.read()
-                if not ret:
-                    # If we can't read, restart from beginning
-                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            # Decoding runs on its own thread so encoder backpressure and
+            # slow reads are absorbed by the frame queue
+            frames = FrameQueue(self.queue_size, self.queue_policy)
+            decoder = threading.Thread(target=self._decode_loop, args=(cap, frames, stop), daemon=True)
+            decoder.start()
+            with self._run_lock:
+                if not stop.is_set():
+                    # Published for status and lag checks; a stale run never overwrites a newer one
+                    self.process, self.frames, self.decoder = process, frames, decoder
+            
+            # Write loop, paced on a fixed schedule
+            timer = self.timer
+            next_tick = time.monotonic()
+            while not stop.is_set():
+                t = time.perf_counter()
+                frame = frames.get(timeout=frame_time)
+                t = timer.record("dequeue", t)
+                if frame is None:
+                    if not decoder.is_alive():
+                        break
                     continue
                 
                 try:
                     # Send frame to FFmpeg
-                    if self.process.poll() is None:  # Process is still running
-                        self.process.stdin.write(frame.tobytes())
-                        time.sleep(frame_time)
+                    if process.poll() is None:  # Process is still running
+                        if self.latency_stamp:
+                            stamp_frame(frame, self.frames_sent)
+                            t = timer.record("stamp", t)
+                        data = frame.tobytes()
+                        t = timer.record("tobytes", t)
+                        process.stdin.write(data)
+                        t = timer.record("write", t)
+                        self.frames_sent += 1
                     else:
                         print(f"FFmpeg process died for stream {self.stream_id}")
                         break
@@ -116,43 +242,311 @@ class RTSPStreamer:
                     print(f"Error in stream {self.stream_id}: {e}")
                     break
                     
+                next_tick += frame_time
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                    timer.record("sleep", t)
+                else:
+                    next_tick = time.monotonic()  # Fell behind, don't burst to catch up
+                    
         except Exception as e:
             print(f"Error in stream {self.stream_id}: {e}")
         finally:
-            self._cleanup()
+            if frames:
+                frames.close()
+            if decoder:
+                decoder.join(timeout=2)
+            self._cleanup(cap, process)
+            # Only touch shared state while this run is still the current one
+            if self.thread is threading.current_thread():
+                if self.process is process:
+                    self.process = None
+                self.live_event.clear()
+                if not stop.is_set():
+                    self.running = False
+                    self.failed = True
+                    self.fatal = fatal
+                    self.failures += 1
+                    delay = min(RETRY_BASE * 2 ** (self.failures - 1), RETRY_MAX)
+                    self.retry_at = time.monotonic() + delay
+                    if fatal:
+                        print(f"Stream {self.stream_id} went down, not retrying until its source is fixed")
+                    else:
+                        print(f"Stream {self.stream_id} went down, retrying in {delay}s")
             
-    def _cleanup(self):
-        """Clean up resources"""
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+    def _decode_loop(self, cap, frames, stop):
+        """Decode frames into the queue at the target fps"""
+        frame_time = 1.0 / self.fps
+        # Source frames per output frame: > 1 when degraded to a lower fps, so
+        # the clip keeps playing at its own speed instead of in slow motion
+        step = self.base[0] / self.fps
+        due = 0.0
+        timer = self.timer
+        next_tick = time.monotonic()
+        try:
+            while not stop.is_set() and cap.isOpened():
+                t = time.perf_counter()
+                due += step
+                while due >= 2:
+                    cap.grab()
+                    due -= 1
+                # Looping is handled inside the capture (prefetched next lap)
+                ret, frame = cap.read()
+                due -= 1
+                t = timer.record("read", t)
+                if not ret:
+                    print(f"Error: Cannot read video for stream {self.stream_id}: {self.video_path}")
+                    break
+                
+                if not frames.put(frame):
+                    break
+                t = timer.record("enqueue", t)
+                    
+                next_tick += frame_time
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                    timer.record("pace", t)
+                else:
+                    next_tick = time.monotonic()
+        except Exception as e:
+            print(f"Decode error in stream {self.stream_id}: {e}")
+        finally:
+            frames.close()
+            
+    def _cleanup(self, cap, process):
+        """Clean up one run's resources"""
+        if cap:
+            cap.release()
             
-        if self.process:
+        if process:
             try:
-                self.process.stdin.close()
-                self.process.terminate()
-                self.process.wait(timeout=5)
+                process.stdin.close()
+                process.terminate()
+                process.wait(timeout=5)
             except:
-                self.process.kill()
-            self.process = None
+                process.kill()
+
+# Config entry fields forwarded to RTSPStreamer as keyword options
+STREAM_OPTIONS = ("latency_stamp", "queue_size", "queue_policy", "hls_dir", "width", "height", "priority")
 
 class MultiStreamManager:
-    def __init__(self):
+    def __init__(self, max_parallel_starts=8, live_timeout=15, max_cpu=0.85, low_cpu=0.6,
+                 max_lag=0.1, load_interval=5.0, protect_priority=1):
         self.streamers = []
+        self.max_parallel_starts = max_parallel_starts
+        self.live_timeout = live_timeout
+        self.time_to_all_live = None
+        self.time_to_live = None  # (live, started, seconds until the last of them went live)
+        self.applied = {}  # key -> config entry of each stream managed via apply_config
+        self.by_key = {}
+        self._next_id = 1
+        
+        # Admission control / degradation: step streams down above max_cpu or
+        # max_lag (fraction of target fps missed), back up below low_cpu
+        self.max_cpu = max_cpu
+        self.low_cpu = low_cpu
+        self.max_lag = max_lag
+        self.load_interval = load_interval
+        self.protect_priority = protect_priority
+        self.load = LoadMonitor()
+        self.cpu = None
+        self.stream_cost = STREAM_CORES / (os.cpu_count() or 1)  # Host CPU fraction per stream (EWMA)
+        self.lags = {}
+        self._frames_at_check = {}
+        self._last_load_check = None
         
-    def add_stream(self, video_path, rtsp_url, fps=25):
-        """Add a new stream configuration"""
-        stream_id = len(self.streamers) + 1
-        streamer = RTSPStreamer(video_path, rtsp_url, fps, stream_id)
+    def add_stream(self, video_path, rtsp_url, fps=25, **options):
+        """Add a new stream configuration; options are passed on to RTSPStreamer"""
+        streamer = RTSPStreamer(video_path, rtsp_url, fps, self._next_id, **options)
+        self._next_id += 1
         self.streamers.append(streamer)
         return streamer
         
-    def start_all_streams(self):
-        """Start all configured streams"""
-        print(f"Starting {len(self.streamers)} streams...")
-        for streamer in self.streamers:
+    def remove_stream(self, streamer):
+        """Stop a stream and drop it from the manager"""
+        streamer.stop_stream()
+        self.streamers.remove(streamer)
+        
+    def apply_config(self, config):
+        """Bring the running fleet in line with a config, touching only changed streams"""
+        if config.get("agents"):
+            print("WARNING: sharding across agents takes effect on the next restart")
+        previous = list(self.applied.values())
+        try:
+            self._apply_streams(config["streams"])
+        except Exception as e:
+            # Don't leave the fleet half-applied: go back to the last good config
+            print(f"WARNING: applying config failed ({e}), restoring the previous streams")
+            self._apply_streams(previous)
+            raise
+        
+    def _apply_streams(self, entries):
+        added, removed, changed = diff_entries(list(self.applied.values()), entries)
+        print(f"Applying config: {len(added)} added, {len(removed)} removed, {len(changed)} changed")
+        
+        running = set(self._running())
+        released = 0  # Running streams stopped here, still counted in self.cpu
+        for entry in removed + changed:
+            key = stream_key(entry)
+            streamer = self.by_key.pop(key)
+            del self.applied[key]
+            released += streamer in running
+            self.remove_stream(streamer)
+            
+        to_start = []
+        for entry in changed + added:
+            options = {k: v for k, v in entry.items() if k in STREAM_OPTIONS}
+            streamer = self.add_stream(entry["video_path"], entry["rtsp_url"], entry["fps"], **options)
+            self.by_key[stream_key(entry)] = streamer
+            self.applied[stream_key(entry)] = entry
+            to_start.append(streamer)
+        
+        admitted = self._admit(to_start, released)
+        if admitted:
+            self._start_streams(admitted)
+        
+    def _running(self):
+        # A stream whose thread exited is down, whatever its flags say
+        return [s for s in self.streamers
+                if s.running and not s.refused and s.thread and s.thread.is_alive()]
+        
+    def _admit(self, streamers, released=0):
+        """Admit streams (highest priority first) while projected CPU stays under max_cpu"""
+        cpu = self.cpu  # Last check_load sample; sampling into its monitor would skew its window
+        if cpu is None:
+            cpu = sample_cpu()  # Nothing measured yet (first config): take a sample of our own
+            released = 0  # ... which no longer includes streams stopped before it
+        if cpu is None:
+            return list(streamers)  # No CPU figures on this platform
+        # Streams stopped since the sample no longer cost anything
+        base = max(cpu - self.stream_cost * released, 0.0)
+            
+        admitted = []
+        for streamer in sorted(streamers, key=lambda s: -s.priority):
+            projected = base + self.stream_cost * (len(admitted) + 1)
+            if projected > self.max_cpu:
+                streamer.refused = True
+                print(f"Refused stream {streamer.stream_id}: projected CPU {projected:.0%} > {self.max_cpu:.0%}")
+            else:
+                streamer.refused = False
+                admitted.append(streamer)
+        # Projection stands in for the measurement until the next check_load
+        self.cpu = base + self.stream_cost * len(admitted)
+        return admitted
+        
+    def _measure_lag(self, elapsed):
+        """Fraction of target fps each live stream missed since the last check"""
+        lags = {}
+        frames = {}  # Rebuilt each check so stopped and dead streams drop out
+        for streamer in self._running():
+            sent = streamer.frames_sent
+            previous = self._frames_at_check.get(streamer)
+            frames[streamer] = sent
+            if previous is None or not streamer.live_event.is_set():
+                continue
+            lags[streamer] = max(0.0, 1.0 - (sent - previous) / elapsed / streamer.fps)
+        self._frames_at_check = frames
+        return lags
+        
+    def _restart_at(self, streamer, level):
+        self._frames_at_check.pop(streamer, None)  # Restart gap isn't lag
+        streamer.set_level(level)
+        
+    def check_load(self):
+        """Sample host load and step one stream down or up; call periodically"""
+        now = time.monotonic()
+        if self._last_load_check is None:
+            self._last_load_check = now
+            self.load.cpu_usage()
+            return
+        elapsed = now - self._last_load_check
+        if elapsed < self.load_interval:
+            return
+        self._last_load_check = now
+        self.cpu = self.load.cpu_usage()
+        self.lags = self._measure_lag(elapsed)
+        running = self._running()
+        if self.cpu is not None and running:
+            sample = self.cpu / len(running)
+            self.stream_cost += COST_SMOOTHING * (sample - self.stream_cost)
+        
+        # Streams that went down are restarted as they were, outside the lag and
+        # load decisions below, so a dead stream never reads as a lagging one.
+        # Each waits out its own backoff; a missing or unreadable source stays
+        # down until the config changes (apply_config restarts changed entries)
+        for streamer in [s for s in self.streamers if s.failed and not s.refused and not s.fatal]:
+            if now < streamer.retry_at:
+                continue
+            print(f"Restarting failed stream {streamer.stream_id} (attempt {streamer.failures + 1})")
             streamer.start_stream()
-            time.sleep(0.5)  # Small delay between starts
+        worst_lag = max(self.lags.values(), default=0.0)
+        
+        if (self.cpu is not None and self.cpu > self.max_cpu) or worst_lag > self.max_lag:
+            # Overloaded: degrade the least important stream that can still step down
+            candidates = [s for s in self._running()
+                          if s.priority < self.protect_priority and s.level < len(QUALITY_LEVELS) - 1]
+            if candidates:
+                streamer = min(candidates, key=lambda s: (s.priority, s.level))
+                self._restart_at(streamer, streamer.level + 1)
+        elif (self.cpu is None or self.cpu < self.low_cpu) and worst_lag <= self.max_lag / 2:
+            # Headroom: restore the most important degraded stream, then admit refused ones
+            degraded = [s for s in self._running() if s.level > 0]
+            refused = [s for s in self.streamers if s.refused]
+            if degraded:
+                streamer = max(degraded, key=lambda s: (s.priority, s.level))
+                self._restart_at(streamer, streamer.level - 1)
+            elif refused:
+                admitted = self._admit(refused[:1])
+                if admitted:
+                    self._start_streams(admitted)
+        
+    def check_servers(self, streamers=None, timeout=5.0):
+        """Check once that every RTSP server referenced by the streams is reachable"""
+        servers = set()
+        for streamer in streamers or self.streamers:
+            url = urllib.parse.urlsplit(streamer.rtsp_url)
+            servers.add((url.hostname, url.port or 554))
+        reachable = True
+        for host, port in sorted(servers):
+            print(f"Checking RTSP server reachability at {host}:{port} ...")
+            if not wait_port(host, port, timeout=timeout):
+                print(f"WARNING: {host}:{port} not reachable now. Streams on it will not go live.")
+                reachable = False
+        return reachable
+        
+    def _start_and_wait(self, streamer):
+        streamer.start_stream()
+        return streamer.wait_until_live(self.live_timeout)
+        
+    def _start_streams(self, streamers):
+        """Start streams in parallel and wait until they are live"""
+        print(f"Starting {len(streamers)} streams...")
+        started = time.time()
+        self.time_to_all_live = None
+        self.check_servers(streamers)
+        
+        # Each worker holds its slot until its stream is live, which bounds
+        # how many captures/encoders/RTSP handshakes are in flight at once
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_parallel_starts) as executor:
+            results = list(executor.map(self._start_and_wait, streamers))
+            
+        elapsed = time.time() - started
+        live = sum(results)
+        live_at = [s.live_at for s, ok in zip(streamers, results) if ok and s.live_at]
+        self.time_to_live = (live, len(streamers), max(live_at) - started if live_at else None)
+        if live == len(streamers):
+            self.time_to_all_live = elapsed
+            print(f"All {live} streams live in {elapsed:.2f}s")
+        else:
+            reached = f", those live within {self.time_to_live[2]:.2f}s" if live_at else ""
+            print(f"WARNING: only {live}/{len(streamers)} streams live after {elapsed:.2f}s{reached}")
+        return live
+        
+    def start_all_streams(self):
+        """Start all configured streams in parallel and wait until they are live"""
+        return self._start_streams(self.streamers)
             
     def stop_all_streams(self):
         """Stop all streams"""
@@ -160,68 +554,83 @@ class MultiStreamManager:
         for streamer in self.streamers:
             streamer.stop_stream()
             
+    def status_of(self, streamer):
+        if streamer.refused:
+            return "Refused (over capacity)"
+        if streamer.failed:
+            return "Failed (source unavailable)" if streamer.fatal else "Failed"
+        if not streamer.running:
+            return "Stopped"
+        if streamer.live_event.is_set():
+            return "Live"
+        return "Starting"
+        
     def stream_status(self):
         """Print status of all streams"""
         print("\n=== Stream Status ===")
         for streamer in self.streamers:
-            status = "Running" if streamer.running else "Stopped"
+            status = self.status_of(streamer)
             print(f"Stream {streamer.stream_id}: {status} - {streamer.rtsp_url}")
+            if streamer.level:
+                print(f"  degraded to level {streamer.level}: {streamer.width}x{streamer.height}@{streamer.fps}")
+            if streamer.frames:
+                stats = streamer.frames.stats()
+                print(f"  queue {streamer.queue_policy}: depth={stats['depth']} blocked={stats['blocked']} "
+                      f"dropped={stats['dropped']} duplicated={stats['duplicated']}")
+            for line in streamer.timer.summary():
+                print(f"  {line}")
+        if self.time_to_all_live is not None:
+            print(f"Time to all live: {self.time_to_all_live:.2f}s")
+        elif self.time_to_live and self.time_to_live[2] is not None:
+            live, total, seconds = self.time_to_live
+            print(f"Time to live: {live}/{total} streams in {seconds:.2f}s")
+        if self.cpu is not None:
+            print(f"Host CPU: {self.cpu:.0%}")
 
 def main():
-    # Create stream manager
-    manager = MultiStreamManager()
+    # Stream definitions live in a fleet config file (JSON, or YAML with PyYAML)
+    # Edits to the file are picked up while running; only changed streams restart
+    parser = argparse.ArgumentParser(description="Publish many looping RTSP streams")
+    parser.add_argument("config", nargs="?", default=DEFAULT_CONFIG, help="fleet config file")
+    parser.add_argument("--agent", metavar="HOST:PORT",
+                        help="run as a worker agent for a fleet controller instead")
+    args = parser.parse_args()
     
-    # Configure 6 streams
-    # You can use the same video file for multiple streams or different files
-    stream_configs = [
-        {
-            "video_path": "videos/3.mp4",
-            "rtsp_url": "rtsp://192.168.1.100:8554/stream1",
-            "fps": 25
-        },
-        {
-            "video_path": "videos/Normal (6).mp4",  # Can reuse same video
-            "rtsp_url": "rtsp://192.168.1.100:8554/stream2",
-            "fps": 25
-        },
-        {
-            "video_path": "videos/shoplift.mp4",
-            "rtsp_url": "rtsp://192.168.1.100:8554/stream3",
-            "fps": 25
-        },
-        {
-            "video_path": "videos/Shoplifting (1).mp4",
-            "rtsp_url": "rtsp://192.168.1.100:8554/stream4",
-            "fps": 25
-        },
-        {
-            "video_path": "videos/Shoplifting (3).mp4",
-            "rtsp_url": "rtsp://192.168.1.100:8554/stream5",
-            "fps": 25
-        },
-        {
-            "video_path": "videos/Shoplifting (55).mp4",
-            "rtsp_url": "rtsp://192.168.1.100:8554/stream6",
-            "fps": 25
-        }
-    ]
+    # `kill -USR1 <pid>` dumps a 10 s collapsed-stack profile of the running process
+    install_signal_trigger()
+    
+    if args.agent:
+        host, port = args.agent.rsplit(":", 1)
+        agent = StreamAgent(MultiStreamManager(), host, int(port))
+        try:
+            agent.serve_forever()
+        except KeyboardInterrupt:
+            print("\nReceived interrupt signal...")
+        finally:
+            agent.shutdown()
+        return
     
-    # Add all streams to manager
-    for config in stream_configs:
-        manager.add_stream(
-            config["video_path"],
-            config["rtsp_url"],
-            config["fps"]
-        )
+    # Create stream manager; a config listing "agents" shards the fleet across them
+    config = load_config(args.config)
+    if config.get("agents"):
+        manager = FleetController(config["agents"])
+    else:
+        manager = MultiStreamManager()
+    watcher = ConfigWatcher(args.config, manager.apply_config)
     
     try:
         # Start all streams
-        manager.start_all_streams()
+        manager.apply_config(config)
         
-        # Keep running and show status
+        # Keep running, reload on config edits and show status
+        last_status = time.time()
         while True:
-            time.sleep(10)
-            manager.stream_status()
+            time.sleep(1)
+            watcher.check()
+            manager.check_load()
+            if time.time() - last_status >= 10:
+                manager.stream_status()
+                last_status = time.time()
             
     except KeyboardInterrupt:
         print("\nReceived interrupt signal...")
@@ -0,0 +1,142 @@
+"""Lightweight diagnostics for the streaming hot loops.
+
+StageTimer keeps a log-bucketed latency histogram per named stage and costs a
+perf_counter() call and a bisect per record, so it can stay on in production:
+
+    t = time.perf_counter()
+    ret, frame = cap.read()
+    t = timer.record("read", t)
+
+SamplingProfiler snapshots every thread's Python stack at a fixed rate for N
+seconds and writes collapsed stacks ("a;b;c count" per line), the input format
+of flamegraph.pl and speedscope. install_signal_trigger() runs it on SIGUSR1.
+"""
+import bisect
+import collections
+import os
+import signal
+import sys
+import threading
+import time
+
+# Histogram bucket upper edges in seconds: 16us .. ~1s, doubling
+BUCKET_EDGES = [16e-6 * 2 ** i for i in range(17)]
+MAX_PROFILE_SECONDS = 60  # Upper bound for remotely triggered captures
+
+
+class StageHistogram:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_EDGES) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, elapsed):
+        self.buckets[bisect.bisect_left(BUCKET_EDGES, elapsed)] += 1
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def quantile(self, q):
+        """Upper bucket edge holding the q-quantile (an upper bound)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return BUCKET_EDGES[i] if i < len(BUCKET_EDGES) else self.max
+        return self.max
+
+
+class StageTimer:
+    """Per-stage timing histograms for one streamer"""
+
+    def __init__(self):
+        self.stages = collections.OrderedDict()
+
+    def record(self, stage, since):
+        """Record time elapsed since `since` under `stage`; returns now for chaining"""
+        now = time.perf_counter()
+        hist = self.stages.get(stage)
+        if hist is None:
+            hist = self.stages[stage] = StageHistogram()
+        hist.add(now - since)
+        return now
+
+    def reset(self):
+        self.stages = collections.OrderedDict()
+
+    def summary(self):
+        """One line per stage: count, mean, p50/p99 upper bounds and max in ms"""
+        lines = []
+        for stage, hist in list(self.stages.items()):
+            if not hist.count:
+                continue
+            lines.append(f"{stage:<8} n={hist.count} mean={hist.total / hist.count * 1000:.2f}ms "
+                         f"p50<={hist.quantile(0.5) * 1000:.2f}ms p99<={hist.quantile(0.99) * 1000:.2f}ms "
+                         f"max={hist.max * 1000:.2f}ms")
+        return lines
+
+
+class SamplingProfiler(threading.Thread):
+    """Sample all thread stacks for `seconds` and write a collapsed-stack file"""
+
+    _active = threading.Lock()  # One capture per process at a time
+
+    def __init__(self, seconds=10, interval=0.005, out_dir="."):
+        super().__init__(daemon=True)
+        self.seconds = seconds
+        self.interval = interval
+        self.out_path = os.path.join(out_dir, f"profile-{os.getpid()}-{int(time.time())}.folded")
+        self.stacks = collections.Counter()
+        self._held = False  # _active already taken by try_start()
+
+    def try_start(self):
+        """Start unless another capture is running; returns False if busy"""
+        if not self._active.acquire(blocking=False):
+            return False
+        self._held = True
+        self.start()
+        return True
+
+    def _sample(self):
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def run(self):
+        if not self._held and not self._active.acquire(blocking=False):
+            print("Profiler already running, ignoring trigger")
+            return
+        try:
+            print(f"Profiling for {self.seconds}s -> {self.out_path}")
+            end = time.monotonic() + self.seconds
+            while time.monotonic() < end:
+                self._sample()
+                time.sleep(self.interval)
+            with open(self.out_path, "w") as f:
+                for stack, count in self.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            print(f"Profile written: {self.out_path} ({sum(self.stacks.values())} samples)")
+        finally:
+            self._active.release()
+
+
+def install_signal_trigger(signum=getattr(signal, "SIGUSR1", None), seconds=10, out_dir="."):
+    """Start a SamplingProfiler whenever the process receives `signum` (main thread only)"""
+    if signum is None:
+        return False  # No SIGUSR1 on this platform
+    signal.signal(signum, lambda sig, frame: SamplingProfiler(seconds, out_dir=out_dir).start())
+    return True
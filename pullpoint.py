@@ -0,0 +1,90 @@
+import collections
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+MAX_TTL = 3600  # Longest subscription lifetime granted, whatever the client asks for
+_DURATION_RE = re.compile(r"^P(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?)?$")
+
+
+def parse_duration(text, default):
+    """Seconds in an xs:duration like PT10S / PT1M, or default if absent/unsupported"""
+    match = _DURATION_RE.match((text or "").strip())
+    if not match or not any(match.groups()):
+        return default
+    hours, minutes, seconds = match.groups()
+    return int(hours or 0) * 3600 + int(minutes or 0) * 60 + float(seconds or 0)
+
+
+class PullPointBroker:
+    """In-memory ONVIF PullPoint subscriptions fed with motion state changes.
+
+    publish() is called from the streamer only when the precomputed motion
+    state flips, so the per-frame cost is a dict lookup on the streamer side.
+    Messages are (utc datetime, state, property operation) tuples.
+    """
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self.cond = threading.Condition()
+        self.subscriptions = {}  # id -> [messages deque, expiry (monotonic)]
+        self.state = False
+
+    def _prune(self):
+        now = time.monotonic()
+        for sub_id in [k for k, sub in self.subscriptions.items() if sub[1] < now]:
+            del self.subscriptions[sub_id]
+
+    def subscribe(self, ttl):
+        """New subscription primed with the current state (PropertyOperation Initialized)"""
+        sub_id = uuid.uuid4().hex
+        messages = collections.deque(maxlen=self.max_queue)
+        with self.cond:
+            self._prune()
+            messages.append((datetime.now(timezone.utc), self.state, "Initialized"))
+            self.subscriptions[sub_id] = [messages, time.monotonic() + ttl]
+        return sub_id
+
+    def renew(self, sub_id, ttl):
+        with self.cond:
+            sub = self.subscriptions.get(sub_id)
+            if sub is None:
+                return False
+            sub[1] = time.monotonic() + ttl
+            return True
+
+    def unsubscribe(self, sub_id):
+        with self.cond:
+            return self.subscriptions.pop(sub_id, None) is not None
+
+    def expires_in(self, sub_id):
+        with self.cond:
+            sub = self.subscriptions.get(sub_id)
+            return None if sub is None else max(sub[1] - time.monotonic(), 0.0)
+
+    def publish(self, state):
+        with self.cond:
+            if state == self.state:
+                return
+            self.state = state
+            message = (datetime.now(timezone.utc), state, "Changed")
+            self._prune()
+            for messages, _ in self.subscriptions.values():
+                messages.append(message)
+            self.cond.notify_all()
+
+    def pull(self, sub_id, timeout, limit):
+        """Long-poll up to timeout seconds; None if the subscription is unknown"""
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while True:
+                sub = self.subscriptions.get(sub_id)
+                if sub is None:
+                    return None
+                messages = sub[0]
+                remaining = deadline - time.monotonic()
+                if messages or remaining <= 0:
+                    return [messages.popleft() for _ in range(min(limit, len(messages)))]
+                self.cond.wait(remaining)
@@ -0,0 +1,107 @@
+"""Minimal RTSP front for an RTP multicast group that is already being fed.
+
+ONVIF clients ask GetStreamUri for an RTSP URI even for RTP-Multicast, then
+DESCRIBE it and SETUP with a multicast transport. The stream itself is sent
+once to the group by FFmpeg (see stream_outputs.build_output_args), so this
+server only answers the handshake: the SDP on DESCRIBE, the group/port/ttl
+on SETUP, and PLAY/GET_PARAMETER/TEARDOWN as no-ops. No media flows over
+these connections, so egress stays one stream however many clients join.
+
+    ffplay -rtsp_transport udp_multicast rtsp://127.0.0.1:8555/multicast/Profile_1
+"""
+import socketserver
+import uuid
+import urllib.parse
+
+CONTROL = "trackID=0"  # The single video track's control URL, relative to the stream URI
+SESSION_TIMEOUT = 60
+PUBLIC = "OPTIONS, DESCRIBE, SETUP, PLAY, GET_PARAMETER, TEARDOWN"
+
+
+def multicast_transport(multicast):
+    """RTSP Transport header value announcing the group RTP (and RTCP on port + 1) go to"""
+    port = multicast["port"]
+    return (f"RTP/AVP;multicast;destination={multicast['group']};"
+            f"port={port}-{port + 1};ttl={multicast.get('ttl', 1)}")
+
+
+class MulticastRTSPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            request = self._read_request()
+            if request is None:
+                return
+            method, url, headers = request
+            path = urllib.parse.urlsplit(url).path
+            if path.endswith("/" + CONTROL):
+                path = path[:-len(CONTROL) - 1]
+            session = self.server.session_for(path)
+            cseq = headers.get("cseq", "0")
+
+            if method == "OPTIONS":
+                self._reply(cseq, {"Public": PUBLIC})
+            elif session is None:
+                self._reply(cseq, status="404 Not Found")
+            elif method == "DESCRIBE":
+                sdp, _ = session
+                base = url if url.endswith("/") else url + "/"
+                self._reply(cseq, {"Content-Base": base, "Content-Type": "application/sdp"}, sdp)
+            elif method == "SETUP":
+                _, transport = session
+                if "multicast" not in headers.get("transport", ""):
+                    # Unicast is served by the main RTSP server, not from here
+                    self._reply(cseq, status="461 Unsupported Transport")
+                else:
+                    session_id = headers.get("session", "").split(";")[0] or uuid.uuid4().hex[:16]
+                    self._reply(cseq, {"Transport": transport,
+                                       "Session": f"{session_id};timeout={SESSION_TIMEOUT}"})
+            elif method in ("PLAY", "GET_PARAMETER"):
+                extra = {"Range": "npt=0.000-"} if method == "PLAY" else {}
+                self._reply(cseq, {"Session": headers.get("session", ""), **extra})
+            elif method == "TEARDOWN":
+                self._reply(cseq, {"Session": headers.get("session", "")})
+                return
+            else:
+                self._reply(cseq, status="501 Not Implemented")
+
+    def _read_request(self):
+        """(method, url, lower-cased headers) of the next request, None on EOF or garbage"""
+        line = self.rfile.readline(4096)
+        while line in (b"\r\n", b"\n"):  # Tolerate stray blank lines between requests
+            line = self.rfile.readline(4096)
+        parts = line.decode("utf-8", "replace").split()
+        if len(parts) != 3 or not parts[2].startswith("RTSP/"):
+            return None
+        headers = {}
+        while True:
+            line = self.rfile.readline(4096)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("utf-8", "replace").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            return None
+        if length > 0:
+            self.rfile.read(min(length, 65536))  # Bodies (e.g. GET_PARAMETER) are ignored
+        return parts[0].upper(), parts[1], headers
+
+    def _reply(self, cseq, headers=None, body="", status="200 OK"):
+        data = body.encode("utf-8")
+        lines = [f"RTSP/1.0 {status}", f"CSeq: {cseq}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items() if value]
+        if data:
+            lines.append(f"Content-Length: {len(data)}")
+        self.wfile.write(("\r\n".join(lines) + "\r\n\r\n").encode("utf-8") + data)
+
+
+class MulticastRTSPServer(socketserver.ThreadingTCPServer):
+    """Answers RTSP handshakes for multicast streams; session_for(path) -> (sdp, transport) or None"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, session_for):
+        super().__init__(address, MulticastRTSPHandler)
+        self.session_for = session_for
@@ -0,0 +1,46 @@
+import threading
+import time
+import uuid
+
+import cv2
+
+
+class SnapshotSlot:
+    """Latest frame of a stream plus a JPEG of it refreshed at most once per interval.
+
+    The streamer calls publish() every frame, which only swaps a reference.
+    Pollers call jpeg(); however many there are, the frame is JPEG encoded
+    at most once per `interval` seconds and everyone gets the cached bytes.
+    """
+
+    def __init__(self, interval=1.0, quality=80):
+        self.interval = interval
+        self.quality = quality
+        self.lock = threading.Lock()
+        self.frame = None
+        self.frame_seq = 0
+        self.data = None
+        self.etag = None
+        self.encoded_at = 0.0
+        self.encoded_seq = -1
+        self.encodes = 0
+        self._tag = uuid.uuid4().hex[:8]  # Keeps ETags unique across restarts
+
+    def publish(self, frame):
+        self.frame = frame
+        self.frame_seq += 1
+
+    def jpeg(self):
+        """Return (jpeg bytes, etag), or (None, None) before the first frame"""
+        with self.lock:
+            frame, seq = self.frame, self.frame_seq
+            stale = self.data is None or time.monotonic() - self.encoded_at >= self.interval
+            if frame is not None and seq != self.encoded_seq and stale:
+                ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                if ok:
+                    self.data = buf.tobytes()
+                    self.etag = f'"{self._tag}-{seq}"'
+                    self.encoded_at = time.monotonic()
+                    self.encoded_seq = seq
+                    self.encodes += 1
+            return self.data, self.etag
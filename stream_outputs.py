@@ -0,0 +1,88 @@
+import os
+
+# Extra outputs muxed from the single encode alongside the RTSP push
+
+# HLS segment ring defaults: ~1 s fMP4 segments (cut on the 30-frame GOP),
+# six in the playlist, older ones deleted as new ones land
+HLS_TIME = 1
+HLS_LIST_SIZE = 6
+
+
+def _tee_escape(value):
+    # Characters the tee muxer treats as syntax inside a slave spec
+    for ch in ("\\", "|", "[", "]"):
+        value = value.replace(ch, "\\" + ch)
+    return value
+
+
+def multicast_url(multicast):
+    """rtp:// URL for a {"group", "port", "ttl", "interface"} multicast config"""
+    url = f"rtp://{multicast['group']}:{multicast['port']}?ttl={multicast.get('ttl', 1)}&pkt_size=1316"
+    if multicast.get("interface"):
+        url += f"&localaddr={multicast['interface']}"
+    return url
+
+
+def multicast_sdp(multicast, origin_ip, name, control=None):
+    """SDP describing the multicast RTP session sent by build_output_args"""
+    sdp = (
+        "v=0\r\n"
+        f"o=- 0 0 IN IP4 {origin_ip}\r\n"
+        f"s={name}\r\n"
+        f"c=IN IP4 {multicast['group']}/{multicast.get('ttl', 1)}\r\n"
+        "t=0 0\r\n"
+        f"m=video {multicast['port']} RTP/AVP 96\r\n"
+        "a=rtpmap:96 H264/90000\r\n"
+        # Baseline 3.1, FU-A packetization as produced by FFmpeg's RTP muxer
+        "a=fmtp:96 packetization-mode=1;profile-level-id=42e01f\r\n"
+        "a=recvonly\r\n"
+    )
+    if control:
+        sdp += f"a=control:{control}\r\n"  # Track URL for RTSP SETUP
+    return sdp
+
+
+def build_output_args(rtsp_url, hls_dir=None, multicast=None,
+                      hls_time=HLS_TIME, hls_list_size=HLS_LIST_SIZE):
+    """FFmpeg output args: RTSP push, plus HLS and/or RTP multicast from the same encode.
+
+    Extra outputs go through the tee muxer, so each costs muxing and I/O
+    only, not a second encode, and onfail=ignore keeps the RTSP push alive
+    if one of them fails (e.g. disk full).
+
+    HLS: fMP4 segments are written as .tmp and renamed when complete
+    (playlists always are), and delete_segments keeps the on-disk ring
+    bounded. FFmpeg's hls muxer has no LL-HLS partial segments, so latency
+    is bounded by the GOP length.
+
+    Multicast: RTP is sent once to the group however many viewers join.
+    dump_extra repeats SPS/PPS on every keyframe so receivers can join
+    mid-stream from the SDP alone.
+    """
+    if not hls_dir and not multicast:
+        return ["-f", "rtsp", "-rtsp_transport", "tcp", rtsp_url]
+
+    slaves = [f"[f=rtsp:rtsp_transport=tcp]{rtsp_url}"]
+    args = ["-map", "0:v"]
+
+    if hls_dir:
+        os.makedirs(hls_dir, exist_ok=True)
+        segment_path = _tee_escape(os.path.join(hls_dir, "seg_%05d.m4s"))
+        playlist_path = _tee_escape(os.path.join(hls_dir, "index.m3u8"))
+        hls_opts = ":".join([
+            "f=hls",
+            "onfail=ignore",
+            f"hls_time={hls_time}",
+            f"hls_list_size={hls_list_size}",
+            "hls_segment_type=fmp4",
+            "hls_fmp4_init_filename=init.mp4",
+            f"hls_segment_filename={segment_path}",
+            "hls_flags=delete_segments+independent_segments+temp_file+program_date_time",
+        ])
+        slaves.append(f"[{hls_opts}]{playlist_path}")
+        args += ["-flags", "+global_header"]  # Needed by the fMP4 init segment behind tee
+
+    if multicast:
+        slaves.append(f"[f=rtp:onfail=ignore:bsfs/v=dump_extra]{_tee_escape(multicast_url(multicast))}")
+
+    return args + ["-f", "tee", "|".join(slaves)]
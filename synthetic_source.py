@@ -0,0 +1,193 @@
+"""Procedural surveillance-like camera source, a drop-in for cv2.VideoCapture.
+
+Use a video path of the form
+
+    synthetic://<camera_id>?width=640&height=480&fps=25&blobs=5&deterministic=1
+
+and RTSPStreamer renders frames instead of decoding a file. The streamer
+passes its own frame rate, which overrides the URL's fps so the overlay
+clock and blob motion run in real time. Each camera ID
+seeds its own background, blob colours and motion, so thousands of cameras
+look distinct. Frames are rendered a batch at a time into a small ring of
+preallocated buffers; a frame returned by read() stays valid for
+(buffers - 1) * batch further reads. Pass `hold`, the number of frames the
+consumer may still reference (queue depth plus in-flight frames), and the
+ring is sized so none of them is overwritten.
+"""
+import math
+import time
+import urllib.parse
+import zlib
+from datetime import datetime, timezone
+
+import cv2
+import numpy as np
+
+SCHEME = "synthetic://"
+BUFFERS = 3  # Minimum ring size in batches
+MIN_SIZE = 64  # Smallest width/height the scene layout fits in
+NOISE_BANK = 8
+_noise_banks = {}  # Shared per (height, width, noise); read-only once built
+DETERMINISTIC_EPOCH = 1_700_000_000.0  # Fixed clock for reproducible output
+
+
+def _noise_bank(height, width, noise):
+    key = (height, width, noise)
+    if key not in _noise_banks:
+        rng = np.random.default_rng(noise)
+        _noise_banks[key] = rng.integers(0, 2 * noise + 1, (NOISE_BANK, height, width, 3), dtype=np.uint8)
+    return _noise_banks[key]
+
+
+def is_synthetic(path):
+    return str(path).startswith(SCHEME)
+
+
+def open_capture(path, hold=None, fps=None):
+    """cv2.VideoCapture for files, SyntheticCapture for synthetic:// paths"""
+    if is_synthetic(path):
+        return SyntheticCapture.from_url(path, hold, fps)
+    return cv2.VideoCapture(str(path))
+
+
+class SyntheticCapture:
+    """Renders moving blobs over a noisy static scene with ID and clock overlays"""
+
+    def __init__(self, camera_id, width=640, height=480, fps=25, blobs=5,
+                 batch=4, noise=6, deterministic=False, hold=None):
+        if width < MIN_SIZE or height < MIN_SIZE:
+            raise ValueError(f"Synthetic camera {camera_id} needs at least {MIN_SIZE}x{MIN_SIZE}, "
+                             f"got {width}x{height}")
+        if fps <= 0:
+            raise ValueError(f"Synthetic camera {camera_id} needs a positive fps, got {fps}")
+        self.camera_id = camera_id
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.batch = batch
+        self.position = 0
+        self.opened = True
+        self.epoch = DETERMINISTIC_EPOCH if deterministic else time.time()
+        rng = np.random.default_rng(zlib.crc32(camera_id.encode()))
+
+        # Static scene: lit floor gradient plus a few "shelves"/"walls", kept
+        # `noise` levels away from 0/255 so uint8 noise addition can't wrap
+        yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+        tint = rng.uniform(0.6, 1.0, 3).astype(np.float32)
+        base = 60 + 90 * (yy / height)[..., None] * tint + 20 * np.sin(xx / width * np.pi)[..., None]
+        for _ in range(rng.integers(2, 6)):
+            x0, y0 = rng.integers(0, width - 40), rng.integers(0, height - 40)
+            w, h = rng.integers(20, width // 3), rng.integers(20, height // 3)
+            base[y0:y0 + h, x0:x0 + w] = rng.uniform(30, 200, 3)
+        self.background = np.clip(base, noise, 255 - noise).astype(np.uint8) - np.uint8(noise)
+
+        # Sensor noise: a small bank of precomputed fields cycled per frame
+        self.noise_bank = _noise_bank(height, width, noise)
+        self.noise_offset = int(rng.integers(0, NOISE_BANK))
+
+        # Blobs ("people"): circular sprites bouncing around the scene
+        sizes = rng.integers(height // 12, height // 5, blobs)
+        self.blob_sizes = sizes
+        self.blob_colors = rng.integers(0, 256, (blobs, 3)).astype(np.uint8)
+        self.blob_start = rng.uniform(0, 1, (blobs, 2)) * np.stack([width - sizes, height - sizes], axis=1)
+        self.blob_velocity = rng.uniform(-1, 1, (blobs, 2)) * [width, height] / (fps * 6.0)
+        self.blob_masks = []
+        for size in sizes:
+            r = (size - 1) / 2.0
+            y, x = np.ogrid[:size, :size]
+            self.blob_masks.append(((x - r) ** 2 + (y - r) ** 2 <= r * r)[..., None])
+
+        buffers = BUFFERS if hold is None else max(BUFFERS, math.ceil(hold / batch) + 1)
+        self.buffers = np.empty((buffers, batch, height, width, 3), dtype=np.uint8)
+        self.buffer_index = -1
+        self.batch_start = None
+
+    @classmethod
+    def from_url(cls, url, hold=None, fps=None):
+        parts = urllib.parse.urlsplit(str(url))
+        query = dict(urllib.parse.parse_qsl(parts.query))
+        camera_id = (parts.netloc + parts.path).strip("/") or "cam"
+        return cls(camera_id,
+                   width=int(query.get("width", 640)),
+                   height=int(query.get("height", 480)),
+                   fps=fps or float(query.get("fps", 25)),
+                   blobs=int(query.get("blobs", 5)),
+                   batch=int(query.get("batch", 4)),
+                   noise=int(query.get("noise", 6)),
+                   deterministic=query.get("deterministic", "0") not in ("0", "false", ""),
+                   hold=hold)
+
+    def _bounce(self, start, velocity, t, span):
+        # Triangle wave keeps each blob inside [0, span] without branching
+        period = 2 * span
+        pos = np.mod(start + velocity * t, period)
+        return np.where(pos > span, period - pos, pos)
+
+    def _render_batch(self, first):
+        self.buffer_index = (self.buffer_index + 1) % len(self.buffers)
+        out = self.buffers[self.buffer_index]
+        frames = np.arange(first, first + self.batch)
+
+        # Background + noise for the whole batch
+        for i, n in enumerate(frames):
+            np.add(self.background, self.noise_bank[(n + self.noise_offset) % NOISE_BANK], out=out[i])
+
+        # Blob positions for every (frame, blob) pair at once
+        spans = np.stack([self.width - self.blob_sizes, self.height - self.blob_sizes], axis=1)
+        pos = self._bounce(self.blob_start[None], self.blob_velocity[None],
+                           frames[:, None, None].astype(np.float64), spans[None]).astype(int)
+
+        for i, n in enumerate(frames):
+            frame = out[i]
+            for j, size in enumerate(self.blob_sizes):
+                x, y = pos[i, j]
+                np.copyto(frame[y:y + size, x:x + size], self.blob_colors[j], where=self.blob_masks[j])
+
+            stamp = datetime.fromtimestamp(self.epoch + n / self.fps, timezone.utc)
+            cv2.putText(frame, stamp.strftime("%Y-%m-%d %H:%M:%S"), (10, self.height - 12),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1, cv2.LINE_8)
+            cv2.putText(frame, self.camera_id, (10, self.height // 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1, cv2.LINE_8)
+        self.batch_start = first
+
+    # ----- cv2.VideoCapture interface -----
+    def isOpened(self):
+        return self.opened
+
+    def read(self):
+        if not self.opened:
+            return False, None
+        if self.batch_start is None or not (self.batch_start <= self.position < self.batch_start + self.batch):
+            self._render_batch(self.position)
+        frame = self.buffers[self.buffer_index, self.position - self.batch_start]
+        self.position += 1
+        return True, frame
+
+    def grab(self):
+        """Advance one frame without rendering it"""
+        if not self.opened:
+            return False
+        self.position += 1
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.position)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float("inf")  # Endless source, never loops
+        return 0.0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.position = int(value)
+            return True
+        return False
+
+    def release(self):
+        self.opened = False
@@ -5,12 +5,26 @@ import uuid
 import subprocess
 import time
 import os
+import sys
 import logging
 from pathlib import Path
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import re
+import urllib.parse
 from datetime import datetime, timezone
 
+from latency_probe import stamp_frame
+from synthetic_source import is_synthetic
+from looping_capture import open_source
+from snapshot import SnapshotSlot
+from mjpeg import MJPEGBroadcaster
+from stream_outputs import build_output_args, multicast_sdp
+from rtsp_multicast import CONTROL, MulticastRTSPServer, multicast_transport
+from motion_index import load_or_build, state_at, transitions
+from pullpoint import MAX_TTL, PullPointBroker, parse_duration
+from profiling import MAX_PROFILE_SECONDS, SamplingProfiler, StageTimer, install_signal_trigger
+from fleet_config import ConfigWatcher, load_config
+
 
 # ----------- USER CONFIG -----------
 DEVICE_IP = "192.168.1.100"
@@ -23,6 +37,19 @@ DEVICE_NAME = "VirtualCCTV"
 PROFILE_TOKEN = "Profile_1"
 DEVICE_UUID = f"urn:uuid:{uuid.uuid4()}"
 WS_DISCOVERY_PORT = 3702
+STREAM_FPS = 25
+STREAM_WIDTH = 640
+STREAM_HEIGHT = 480
+LATENCY_STAMP = False  # Embed a wallclock barcode for latency_probe.py
+SNAPSHOT_INTERVAL = 1.0  # Seconds between snapshot JPEG encodes, however many pollers
+PREVIEW_FPS = 10  # MJPEG browser preview rate at /preview/<profile token>
+HLS_DIR = None  # Set to a directory to also write fMP4 HLS from the same encode
+MOTION_EVENTS = True  # Serve PullPoint motion events from the clip's precomputed index
+# RTP multicast copy of the stream, e.g. {"group": "239.255.0.1", "port": 5004, "ttl": 1};
+# egress stays one stream however many viewers join. None disables it.
+# ONVIF clients get rtsp://<ip>:<rtsp_port>/multicast/<profile token> for the handshake
+MULTICAST = None
+MULTICAST_RTSP_PORT = 8555  # Default "rtsp_port" of the multicast handshake server
 
 RTSP_MAIN = f"rtsp://{USERNAME}:{PASSWORD}@{DEVICE_IP}:{RTSP_PORT}/Streaming/Channels/101"
 
@@ -37,34 +64,64 @@ logger = logging.getLogger("VCCCTV")
 print("Virtual CCTV System v4.0 -- ONVIF/RTSP Emulation compatible with Kotlin client")
 logger.info("Starting Virtual CCTV System...")
 
+# Motion events for every PullPoint subscriber, fed by the streamer
+EVENTS = PullPointBroker()
+
 
 # --------- RTSP Streamer ----------
 class RTSPStreamer(threading.Thread):
-    def __init__(self, video_path, rtsp_url, fps=25, width=640, height=480):
+    def __init__(self, video_path, rtsp_url, fps=25, width=640, height=480, latency_stamp=False,
+                 snapshot_interval=1.0, preview_fps=10, hls_dir=None, motion_events=True, multicast=None):
         super().__init__()
         self.video_path = video_path
         self.rtsp_url = rtsp_url
         self.fps = fps
         self.width = width
         self.height = height
+        self.latency_stamp = latency_stamp
+        self.hls_dir = hls_dir
+        self.motion_events = motion_events
+        self.multicast = multicast
+        self.motion = None  # Frame index -> motion state flips for the clip
+        self.frames_sent = 0
+        self.snapshot = SnapshotSlot(snapshot_interval)  # Latest frame for GetSnapshotUri
+        self.preview = MJPEGBroadcaster(self.snapshot, fps=preview_fps)
+        self.timer = StageTimer()  # Per-stage hot loop histograms, see /debug/stages
         self.proc = None
         self.running = True
 
+    def _load_motion(self, cap):
+        """Load (or build) the clip's motion index and start publishing events from it"""
+        try:
+            motion = transitions(load_or_build(self.video_path))
+        except Exception as e:
+            logger.error(f"Motion index unavailable, events disabled: {e}")
+            return
+        if not self.running:
+            return
+        self.motion = motion
+        EVENTS.publish(state_at(motion, max(cap.frame_index, 0)))
+        logger.info(f"Motion index loaded: {len(motion)} transitions per lap")
+
     def run(self):
-        if not os.path.exists(self.video_path):
+        if not is_synthetic(self.video_path) and not os.path.exists(self.video_path):
             logger.error(f"Video file not found: {self.video_path}")
             return
-        cap = cv2.VideoCapture(str(self.video_path))
+        cap = open_source(self.video_path, fps=self.fps)
         if not cap.isOpened():
             logger.error(f"Cannot open video file: {self.video_path}")
             return
 
+        if self.motion_events and not is_synthetic(self.video_path):
+            # A first build decodes the whole clip; the stream goes live meanwhile
+            threading.Thread(target=self._load_motion, args=(cap,), daemon=True).start()
+
         ffmpeg_cmd = [
             "ffmpeg", "-re", "-stream_loop", "-1", "-f", "rawvideo", "-pix_fmt", "bgr24",
             "-s", f"{self.width}x{self.height}", "-r", str(self.fps), "-i", "-",
             "-c:v", "libx264", "-pix_fmt", "yuv420p", "-profile:v", "baseline", "-level:v", "3.1",
-            "-preset", "ultrafast", "-tune", "zerolatency", "-g", "30", "-f", "rtsp",
-            "-rtsp_transport", "tcp", self.rtsp_url
+            "-preset", "ultrafast", "-tune", "zerolatency", "-g", "30",
+            *build_output_args(self.rtsp_url, self.hls_dir, self.multicast)
         ]
 
         self.proc = subprocess.Popen(
@@ -77,18 +134,35 @@ class RTSPStreamer(threading.Thread):
         frame_time = 1.0 / self.fps
         logger.info(f"Started RTSP stream: {self.rtsp_url}")
 
+        timer = self.timer
         while self.running:
-            ret, frame = cap.read()
+            t = time.perf_counter()
+            ret, frame = cap.read()  # Loops without seeking, see LoopingCapture
+            t = timer.record("read", t)
             if not ret:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                continue
+                logger.error(f"Cannot read video file: {self.video_path}")
+                break
+            if self.motion:
+                state = self.motion.get(cap.frame_index)
+                if state is not None:
+                    EVENTS.publish(state)
             frame = cv2.resize(frame, (self.width, self.height))
+            t = timer.record("resize", t)
+            if self.latency_stamp:
+                stamp_frame(frame, self.frames_sent)
+                t = timer.record("stamp", t)
             try:
-                self.proc.stdin.write(frame.tobytes())
+                data = frame.tobytes()
+                t = timer.record("tobytes", t)
+                self.proc.stdin.write(data)
+                t = timer.record("write", t)
+                self.frames_sent += 1
+                self.snapshot.publish(frame)
             except Exception as e:
                 logger.error(f"RTSP streaming stopped: {e}")
                 break
             time.sleep(frame_time)
+            timer.record("sleep", t)
 
         try:
             self.proc.terminate()
@@ -102,20 +176,84 @@ class RTSPStreamer(threading.Thread):
 
 class ONVIFHandler(BaseHTTPRequestHandler):
 
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == "/debug/stages":
+            lines = streamer.timer.summary() if streamer else []
+            self._reply_text("\n".join(lines) + "\n")
+        elif url.path == "/onvif/snapshot":
+            self._reply_snapshot()
+        elif url.path == f"/preview/{PROFILE_TOKEN}" and streamer:
+            streamer.preview.serve(self)
+        elif url.path == "/debug/profile":
+            # Sample the running process for N seconds into a collapsed-stack file
+            query = dict(urllib.parse.parse_qsl(url.query))
+            try:
+                seconds = min(float(query.get("seconds", 10)), MAX_PROFILE_SECONDS)
+            except ValueError:
+                seconds = None
+            if seconds is None or not seconds > 0:  # Also rejects NaN
+                self.send_error(400, f"seconds must be a number in (0, {MAX_PROFILE_SECONDS}]")
+                return
+            profiler = SamplingProfiler(seconds=seconds)
+            if not profiler.try_start():
+                self.send_error(409, "Profiler already running")
+                return
+            self._reply_text(f"Profiling for {profiler.seconds}s -> {profiler.out_path}\n")
+        else:
+            self.send_error(404, "Not Found")
+
+    def _reply_snapshot(self):
+        data, etag = streamer.snapshot.jpeg() if streamer else (None, None)
+        if data is None:
+            self.send_error(503, "No frame yet")
+            return
+        if etag in (tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _reply_text(self, text):
+        data = text.encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
     def do_POST(self):
         logger.info(f"ONVIF POST from {self.client_address[0]} {self.path}")
-        if self.path != "/onvif/device_service":
+        if (self.path not in ("/onvif/device_service", "/onvif/event_service")
+                and not self.path.startswith("/onvif/pullpoint/")):
             self.send_error(404, "Not Found")
             return
 
         content_len = int(self.headers.get('Content-Length', 0))
         req_xml = self.rfile.read(content_len).decode(errors="ignore")
 
+        # Events service (PullPoint) for motion alarms
+        if ("CreatePullPointSubscription" in req_xml or
+            "PullMessages" in req_xml or
+            "Renew" in req_xml or
+            "Unsubscribe" in req_xml or
+            "GetEventProperties" in req_xml):
+            self._reply_xml(self._event_response(req_xml))
+            return
+
         # Handle discovery and media queries with no auth required
         if ("GetCapabilities" in req_xml or
             "GetDeviceInformation" in req_xml or
             "GetProfiles" in req_xml or
             "GetStreamUri" in req_xml or
+            "GetSnapshotUri" in req_xml or
             "GetSystemDateAndTime" in req_xml):
             response_xml = self._soap_response(req_xml)
             self._reply_xml(response_xml)
@@ -124,6 +262,102 @@ class ONVIFHandler(BaseHTTPRequestHandler):
         # Otherwise, respond with 501 Not Implemented as default
         self.send_error(501, "Not Implemented")
 
+    def _event_response(self, req_xml):
+        now = datetime.now(timezone.utc)
+        sub_id = self.path.rsplit("/", 1)[-1] if self.path.startswith("/onvif/pullpoint/") else None
+
+        def field(name):
+            match = re.search(rf"<(?:\w+:)?{name}[^>]*>([^<]+)</(?:\w+:)?{name}>", req_xml)
+            return match.group(1) if match else None
+
+        def termination(seconds):
+            return datetime.fromtimestamp(now.timestamp() + seconds, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        ns = ('xmlns:tev="http://www.onvif.org/ver10/events/wsdl" xmlns:wsnt="http://docs.oasis-open.org/wsn/b-2" '
+              'xmlns:wsa5="http://www.w3.org/2005/08/addressing" xmlns:tns1="http://www.onvif.org/ver10/topics" '
+              'xmlns:tt="http://www.onvif.org/ver10/schema"')
+        current = now.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        if "CreatePullPointSubscription" in req_xml:
+            ttl = min(parse_duration(field("InitialTerminationTime"), 60), MAX_TTL)
+            sub_id = EVENTS.subscribe(ttl)
+            body = f'''<tev:CreatePullPointSubscriptionResponse {ns}>
+<tev:SubscriptionReference><wsa5:Address>http://{DEVICE_IP}:{HTTP_PORT}/onvif/pullpoint/{sub_id}</wsa5:Address></tev:SubscriptionReference>
+<wsnt:CurrentTime>{current}</wsnt:CurrentTime>
+<wsnt:TerminationTime>{termination(ttl)}</wsnt:TerminationTime>
+</tev:CreatePullPointSubscriptionResponse>'''
+
+        elif "PullMessages" in req_xml and sub_id:
+            timeout = min(parse_duration(field("Timeout"), 10), 60)
+            try:
+                limit = int(field("MessageLimit") or 10)
+            except ValueError:
+                return self._soap_fault("Invalid MessageLimit")
+            if limit < 1:
+                return self._soap_fault("Invalid MessageLimit")
+            messages = EVENTS.pull(sub_id, timeout, limit)
+            if messages is None:
+                return self._soap_fault("Unknown subscription")
+            notifications = "".join(f'''<wsnt:NotificationMessage>
+<wsnt:Topic Dialect="http://www.onvif.org/ver10/tev/topicExpression/ConcreteSet">tns1:VideoSource/MotionAlarm</wsnt:Topic>
+<wsnt:Message><tt:Message UtcTime="{at.strftime("%Y-%m-%dT%H:%M:%SZ")}" PropertyOperation="{operation}">
+<tt:Source><tt:SimpleItem Name="Source" Value="VideoSourceToken_1"/></tt:Source>
+<tt:Data><tt:SimpleItem Name="State" Value="{str(state).lower()}"/></tt:Data>
+</tt:Message></wsnt:Message>
+</wsnt:NotificationMessage>''' for at, state, operation in messages)
+            body = f'''<tev:PullMessagesResponse {ns}>
+<tev:CurrentTime>{current}</tev:CurrentTime>
+<tev:TerminationTime>{termination(EVENTS.expires_in(sub_id) or 0)}</tev:TerminationTime>
+{notifications}
+</tev:PullMessagesResponse>'''
+
+        elif "Renew" in req_xml and sub_id:
+            ttl = min(parse_duration(field("TerminationTime"), 60), MAX_TTL)
+            if not EVENTS.renew(sub_id, ttl):
+                return self._soap_fault("Unknown subscription")
+            body = f'''<wsnt:RenewResponse {ns}>
+<wsnt:TerminationTime>{termination(ttl)}</wsnt:TerminationTime>
+<wsnt:CurrentTime>{current}</wsnt:CurrentTime>
+</wsnt:RenewResponse>'''
+
+        elif "Unsubscribe" in req_xml and sub_id:
+            EVENTS.unsubscribe(sub_id)
+            body = f'<wsnt:UnsubscribeResponse {ns}/>'
+
+        elif "GetEventProperties" in req_xml:
+            body = f'''<tev:GetEventPropertiesResponse {ns}>
+<tev:TopicNamespaceLocation>http://www.onvif.org/onvif/ver10/topics/topicns.xml</tev:TopicNamespaceLocation>
+<wsnt:FixedTopicSet>true</wsnt:FixedTopicSet>
+<wstop:TopicSet xmlns:wstop="http://docs.oasis-open.org/wsn/t-1"><tns1:VideoSource><MotionAlarm wstop:topic="true">
+<tt:MessageDescription IsProperty="true">
+<tt:Source><tt:SimpleItemDescription Name="Source" Type="tt:ReferenceToken"/></tt:Source>
+<tt:Data><tt:SimpleItemDescription Name="State" Type="xs:boolean"/></tt:Data>
+</tt:MessageDescription>
+</MotionAlarm></tns1:VideoSource></wstop:TopicSet>
+<wsnt:TopicExpressionDialect>http://www.onvif.org/ver10/tev/topicExpression/ConcreteSet</wsnt:TopicExpressionDialect>
+<tev:MessageContentFilterDialect>http://www.onvif.org/ver10/tev/messageContentFilter/ItemFilter</tev:MessageContentFilterDialect>
+<tev:MessageContentSchemaLocation>http://www.onvif.org/onvif/ver10/schema/onvif.xsd</tev:MessageContentSchemaLocation>
+</tev:GetEventPropertiesResponse>'''
+
+        else:
+            return self._soap_fault("Not Supported")
+
+        return f'''<?xml version="1.0"?>
+<soap:Envelope xmlns:soap="http://www.w3.org/2003/05/soap-envelope"><soap:Body>
+{body}
+</soap:Body></soap:Envelope>'''
+
+    def _soap_fault(self, reason):
+        return f'''<?xml version="1.0"?>
+<soap:Envelope xmlns:soap="http://www.w3.org/2003/05/soap-envelope">
+<soap:Body>
+<soap:Fault>
+<soap:Code><soap:Value>soap:Sender</soap:Value></soap:Code>
+<soap:Reason><soap:Text>{reason}</soap:Text></soap:Reason>
+</soap:Fault>
+</soap:Body>
+</soap:Envelope>'''
+
     def _reply_xml(self, xml):
         data = xml.encode('utf-8')
         self.send_response(200)
@@ -141,10 +375,16 @@ class ONVIFHandler(BaseHTTPRequestHandler):
 <tds:GetCapabilitiesResponse xmlns:tds="http://www.onvif.org/ver10/device/wsdl">
 <tds:Capabilities>
 <tt:Device xmlns:tt="http://www.onvif.org/ver10/schema"><tt:XAddr>{xaddr}</tt:XAddr></tt:Device>
+<tt:Events xmlns:tt="http://www.onvif.org/ver10/schema">
+<tt:XAddr>http://{DEVICE_IP}:{HTTP_PORT}/onvif/event_service</tt:XAddr>
+<tt:WSSubscriptionPolicySupport>false</tt:WSSubscriptionPolicySupport>
+<tt:WSPullPointSupport>true</tt:WSPullPointSupport>
+<tt:WSPausableSubscriptionManagerInterfaceSupport>false</tt:WSPausableSubscriptionManagerInterfaceSupport>
+</tt:Events>
 <tt:Media xmlns:tt="http://www.onvif.org/ver10/schema">
 <tt:XAddr>{xaddr}</tt:XAddr>
 <tt:StreamingCapabilities>
-<tt:RTPMulticast>false</tt:RTPMulticast>
+<tt:RTPMulticast>{'true' if multicast_enabled() else 'false'}</tt:RTPMulticast>
 <tt:RTP_TCP>true</tt:RTP_TCP>
 <tt:RTP_RTSP_TCP>true</tt:RTP_RTSP_TCP>
 </tt:StreamingCapabilities>
@@ -164,6 +404,15 @@ class ONVIFHandler(BaseHTTPRequestHandler):
 </tds:GetDeviceInformationResponse></soap:Body></soap:Envelope>'''
 
         elif "GetProfiles" in req_xml:
+            multicast = ""
+            if multicast_enabled():
+                multicast = f'''
+<tt:Multicast>
+<tt:Address><tt:Type>IPv4</tt:Type><tt:IPv4Address>{MULTICAST["group"]}</tt:IPv4Address></tt:Address>
+<tt:Port>{MULTICAST["port"]}</tt:Port>
+<tt:TTL>{MULTICAST.get("ttl", 1)}</tt:TTL>
+<tt:AutoStart>true</tt:AutoStart>
+</tt:Multicast>'''
             return f'''<?xml version="1.0"?>
 <soap:Envelope xmlns:soap="http://www.w3.org/2003/05/soap-envelope"><soap:Body>
 <trt:GetProfilesResponse xmlns:trt="http://www.onvif.org/ver10/media/wsdl">
@@ -173,31 +422,46 @@ class ONVIFHandler(BaseHTTPRequestHandler):
 <tt:Name>VideoSource_Main</tt:Name>
 <tt:UseCount>1</tt:UseCount>
 <tt:SourceToken>VideoSourceToken_1</tt:SourceToken>
-<tt:Bounds x="0" y="0" width="640" height="480"/>
+<tt:Bounds x="0" y="0" width="{STREAM_WIDTH}" height="{STREAM_HEIGHT}"/>
 </tt:VideoSourceConfiguration>
 <tt:VideoEncoderConfiguration token="EncoderConfig_1">
 <tt:Name>Encoder_Main</tt:Name>
 <tt:UseCount>1</tt:UseCount>
 <tt:Encoding>H264</tt:Encoding>
-<tt:Resolution><tt:Width>640</tt:Width><tt:Height>480</tt:Height></tt:Resolution>
+<tt:Resolution><tt:Width>{STREAM_WIDTH}</tt:Width><tt:Height>{STREAM_HEIGHT}</tt:Height></tt:Resolution>
 <tt:Quality>4</tt:Quality>
-<tt:RateControl><tt:FrameRateLimit>25</tt:FrameRateLimit><tt:BitrateLimit>1000</tt:BitrateLimit></tt:RateControl>
+<tt:RateControl><tt:FrameRateLimit>{STREAM_FPS}</tt:FrameRateLimit><tt:BitrateLimit>1000</tt:BitrateLimit></tt:RateControl>{multicast}
 </tt:VideoEncoderConfiguration>
 </trt:Profiles>
 </soap:Body></soap:Envelope>'''
 
         elif "GetStreamUri" in req_xml:
+            uri = RTSP_MAIN
+            if multicast_enabled() and "RTP-Multicast" in req_xml:
+                uri = multicast_uri()
             return f'''<?xml version="1.0"?>
 <soap:Envelope xmlns:soap="http://www.w3.org/2003/05/soap-envelope"><soap:Body>
 <trt:GetStreamUriResponse xmlns:trt="http://www.onvif.org/ver10/media/wsdl">
 <trt:MediaUri>
-<tt:Uri xmlns:tt="http://www.onvif.org/ver10/schema">{RTSP_MAIN}</tt:Uri>
+<tt:Uri xmlns:tt="http://www.onvif.org/ver10/schema">{uri}</tt:Uri>
 <tt:InvalidAfterConnect>false</tt:InvalidAfterConnect>
 <tt:InvalidAfterReboot>false</tt:InvalidAfterReboot>
 <tt:Timeout>PT60S</tt:Timeout>
 </trt:MediaUri>
 </trt:GetStreamUriResponse></soap:Body></soap:Envelope>'''
 
+        elif "GetSnapshotUri" in req_xml:
+            return f'''<?xml version="1.0"?>
+<soap:Envelope xmlns:soap="http://www.w3.org/2003/05/soap-envelope"><soap:Body>
+<trt:GetSnapshotUriResponse xmlns:trt="http://www.onvif.org/ver10/media/wsdl">
+<trt:MediaUri>
+<tt:Uri xmlns:tt="http://www.onvif.org/ver10/schema">http://{DEVICE_IP}:{HTTP_PORT}/onvif/snapshot</tt:Uri>
+<tt:InvalidAfterConnect>false</tt:InvalidAfterConnect>
+<tt:InvalidAfterReboot>false</tt:InvalidAfterReboot>
+<tt:Timeout>PT60S</tt:Timeout>
+</trt:MediaUri>
+</trt:GetSnapshotUriResponse></soap:Body></soap:Envelope>'''
+
         elif "GetSystemDateAndTime" in req_xml:
             now = datetime.now(timezone.utc)
             return f'''<?xml version="1.0"?>
@@ -293,8 +557,149 @@ onvif://www.onvif.org/location/1
             logger.info(f"Sent WS-Discovery response to {addr[0]}")
 
 
+# --------- RTP Multicast (RTSP handshake only) ---------
+multicast_server = None
+
+
+def multicast_enabled():
+    return bool(MULTICAST) and multicast_server is not None
+
+
+def multicast_uri():
+    port = multicast_server.server_address[1]
+    return f"rtsp://{DEVICE_IP}:{port}/multicast/{PROFILE_TOKEN}"
+
+
+def multicast_session(path):
+    """(SDP, Transport) for the multicast stream at an RTSP path, or None"""
+    if not MULTICAST or path.rstrip("/") != f"/multicast/{PROFILE_TOKEN}":
+        return None
+    sdp = multicast_sdp(MULTICAST, DEVICE_IP, DEVICE_NAME, control=CONTROL)
+    return sdp, multicast_transport(MULTICAST)
+
+
+def start_multicast_server():
+    """Start the handshake server the first time multicast is configured"""
+    global multicast_server
+    if not MULTICAST or multicast_server is not None:
+        return
+    port = MULTICAST.get("rtsp_port", MULTICAST_RTSP_PORT)
+    try:
+        multicast_server = MulticastRTSPServer(("0.0.0.0", port), multicast_session)
+    except OSError as e:
+        logger.error(f"Multicast RTSP server unavailable on port {port}, not advertising multicast: {e}")
+        return
+    threading.Thread(target=multicast_server.serve_forever, daemon=True).start()
+    logger.info(f"RTP multicast: {MULTICAST['group']}:{MULTICAST['port']} (ttl {MULTICAST.get('ttl', 1)}), "
+                f"RTSP handshake at {multicast_uri()}")
+
+
+# --------- Fleet Config (hot reload) ---------
+# Identity fields that need the RTSP pipeline restarted when they change
+STREAM_FIELDS = ("input_file", "fps", "width", "height", "latency_stamp", "hls_dir", "motion_events",
+                 "multicast", "ip", "rtsp_port", "username", "password")
+current_device = None
+streamer = None
+
+
+def select_device(config, name=None):
+    devices = config["devices"]
+    if not devices:
+        raise ValueError("Config has no devices")
+    if name is None:
+        return devices[0]
+    for device in devices:
+        if device["name"] == name:
+            return device
+    raise ValueError(f"Device {name} not found in config")
+
+
+def apply_device_config(device):
+    """Point the USER CONFIG globals at a fleet config device entry"""
+    global DEVICE_IP, HTTP_PORT, RTSP_PORT, USERNAME, PASSWORD, INPUT_FILE
+    global DEVICE_NAME, PROFILE_TOKEN, DEVICE_UUID, RTSP_MAIN
+    global STREAM_FPS, STREAM_WIDTH, STREAM_HEIGHT, LATENCY_STAMP, SNAPSHOT_INTERVAL, PREVIEW_FPS, HLS_DIR
+    global MOTION_EVENTS, MULTICAST
+    DEVICE_IP = device["ip"]
+    HTTP_PORT = device["http_port"]
+    RTSP_PORT = device["rtsp_port"]
+    USERNAME = device["username"]
+    PASSWORD = device["password"]
+    # Path() would fold the // of synthetic:// URLs
+    INPUT_FILE = device["input_file"] if is_synthetic(device["input_file"]) else Path(device["input_file"])
+    DEVICE_NAME = device["name"]
+    PROFILE_TOKEN = device["profile_token"]
+    DEVICE_UUID = device.get("uuid", DEVICE_UUID)
+    STREAM_FPS = device["fps"]
+    STREAM_WIDTH = device["width"]
+    STREAM_HEIGHT = device["height"]
+    LATENCY_STAMP = device["latency_stamp"]
+    SNAPSHOT_INTERVAL = device["snapshot_interval"]
+    PREVIEW_FPS = device["preview_fps"]
+    HLS_DIR = device["hls_dir"]
+    MOTION_EVENTS = device["motion_events"]
+    MULTICAST = device["multicast"]
+    RTSP_MAIN = f"rtsp://{USERNAME}:{PASSWORD}@{DEVICE_IP}:{RTSP_PORT}/Streaming/Channels/101"
+
+
+def start_streamer():
+    global streamer
+    streamer = RTSPStreamer(str(INPUT_FILE), RTSP_MAIN, fps=STREAM_FPS, width=STREAM_WIDTH,
+                            height=STREAM_HEIGHT, latency_stamp=LATENCY_STAMP,
+                            snapshot_interval=SNAPSHOT_INTERVAL, preview_fps=PREVIEW_FPS, hls_dir=HLS_DIR,
+                            motion_events=MOTION_EVENTS, multicast=MULTICAST)
+    streamer.daemon = True
+    streamer.start()
+    start_multicast_server()
+
+
+def stop_streamer():
+    if streamer is None:
+        return
+    streamer.running = False
+    streamer.join(timeout=5)
+
+
+def reload_device_config(config, name=None):
+    """Apply a (re)loaded config, restarting the stream only if it changed"""
+    global current_device
+    device = select_device(config, name)
+    if device == current_device:
+        return
+    previous = current_device or {}
+    apply_device_config(device)
+    current_device = device
+    if previous and previous["http_port"] != device["http_port"]:
+        logger.warning("HTTP port change takes effect on the next restart")
+    if multicast_server is not None and MULTICAST:
+        if MULTICAST.get("rtsp_port", MULTICAST_RTSP_PORT) != multicast_server.server_address[1]:
+            logger.warning("Multicast rtsp_port change takes effect on the next restart")
+    if streamer is not None:
+        # These apply live, no restart
+        streamer.snapshot.interval = SNAPSHOT_INTERVAL
+        streamer.preview.fps = PREVIEW_FPS
+    if streamer is not None and any(previous.get(f) != device[f] for f in STREAM_FIELDS):
+        logger.info("Stream settings changed, restarting RTSP stream")
+        stop_streamer()
+        start_streamer()
+    else:
+        logger.info("Device config applied")
+
+
+def watch_config(watcher):
+    while True:
+        time.sleep(1)
+        watcher.check()
+
+
 # --------- System Entry Point ---------
 if __name__ == "__main__":
+    # Optional: python virtual_CCTV.py fleet.json [device_name]
+    config_path = sys.argv[1] if len(sys.argv) > 1 else None
+    device_name = sys.argv[2] if len(sys.argv) > 2 else None
+    if config_path:
+        reload_device_config(load_config(config_path), device_name)
+
     logger.info("=" * 59)
     logger.info("Virtual CCTV System Started (Kotlin Compatible ONVIF + RTSP)")
     logger.info("=" * 59)
@@ -305,12 +710,19 @@ if __name__ == "__main__":
     logger.info(f"Password: {PASSWORD}")
     logger.info(f"RTSP streaming URL: {RTSP_MAIN}")
     logger.info(f"ONVIF URL: http://{DEVICE_IP}:{HTTP_PORT}/onvif/device_service")
+    logger.info(f"Preview URL: http://{DEVICE_IP}:{HTTP_PORT}/preview/{PROFILE_TOKEN}")
 
-    streamer = RTSPStreamer(str(INPUT_FILE), RTSP_MAIN, fps=25, width=640, height=480)
-    streamer.daemon = True
-    streamer.start()
+    start_streamer()
+
+    # `kill -USR1 <pid>` or GET /debug/profile?seconds=N dumps a collapsed-stack profile
+    install_signal_trigger()
+
+    if config_path:
+        watcher = ConfigWatcher(config_path, lambda config: reload_device_config(config, device_name))
+        threading.Thread(target=watch_config, args=(watcher,), daemon=True).start()
 
     threading.Thread(target=wsdiscovery_responder, daemon=True).start()
 
-    server = HTTPServer(("0.0.0.0", HTTP_PORT), ONVIFHandler)
+    # Threaded so snapshot pollers and slow clients don't serialize behind each other
+    server = ThreadingHTTPServer(("0.0.0.0", HTTP_PORT), ONVIFHandler)
     server.serve_forever()